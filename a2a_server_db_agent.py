@@ -9,6 +9,8 @@ from custom_types import AgentCapabilities, AgentCard, AgentSkill, MissingAPIKey
 from push_notification_auth import PushNotificationSenderAuth
 from server import A2AServer
 from task_manager_database_agent import DatabaseAgentTaskManager
+from task_scheduler import TaskSchedulerPolicy
+from task_store import SqliteTaskStore
 
 load_dotenv()
 
@@ -19,7 +21,16 @@ logger = logging.getLogger(__name__)
 @click.command()
 @click.option("--host", "host", default="localhost")
 @click.option("--port", "port", default=8000)
-def main(host, port):
+@click.option("--workers", "workers", default=1)
+@click.option("--task-db", "task_db", default=None)
+@click.option("--max-concurrent-runs", "max_concurrent_runs", default=16)
+@click.option(
+    "--push-signing-alg",
+    "push_signing_alg",
+    default="RS256",
+    type=click.Choice(["RS256", "ES256", "EdDSA"]),
+)
+def main(host, port, workers, task_db, max_concurrent_runs, push_signing_alg):
     """Starts the Database Agent server."""
     try:
         if not os.getenv("OPENAI_API_KEY"):
@@ -45,14 +56,20 @@ def main(host, port):
         )
 
         notification_sender_auth = PushNotificationSenderAuth()
-        notification_sender_auth.generate_jwk()
+        notification_sender_auth.generate_jwk(push_signing_alg)
         server = A2AServer(
             agent_card=agent_card,
             task_manager=DatabaseAgentTaskManager(
-                agent=DatabaseAgent(), notification_sender_auth=notification_sender_auth
+                agent=DatabaseAgent(max_workers=max_concurrent_runs),
+                notification_sender_auth=notification_sender_auth,
+                task_store=SqliteTaskStore(task_db) if task_db else None,
+                scheduler_policy=TaskSchedulerPolicy(
+                    max_concurrent_runs=max_concurrent_runs
+                ),
             ),
             host=host,
             port=port,
+            workers=workers,
         )
 
         server.app.add_route(
@@ -1,4 +1,6 @@
 import asyncio
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, AsyncIterable, Dict, Literal, Sequence, Union
 from typing_extensions import Annotated, TypedDict
 
@@ -38,11 +40,43 @@ memory = MemorySaver()
 #     return asyncio.run(_fetch_tools())
 
 class DatabaseAgent:
+    """The LangGraph graph and its LLM calls are synchronous. They run on a sized
+    thread pool so a slow LLM call never blocks the event loop (and with it every
+    other request, SSE stream and agent card fetch of the server).
 
-    def __init__(self):
-        self.graph = get_database_agent(memory)
+    A cancelled run cannot stop its thread, so each session is locked until the
+    graph call of that session has actually returned. The next run of the session
+    waits for the leftover thread instead of sharing the session's MemorySaver
+    thread with it.
+    """
 
-    def invoke(self, query, sessionId) -> str:
+    def __init__(self, max_workers: int = 16):
+        self.graph = get_database_agent(memory)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="database-agent"
+        )
+        self._session_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = (
+            weakref.WeakValueDictionary()
+        )
+
+    async def _lock_session(self, sessionId) -> asyncio.Lock:
+        lock = self._session_locks.get(sessionId)
+        if lock is None:
+            lock = self._session_locks[sessionId] = asyncio.Lock()
+        await lock.acquire()
+        return lock
+
+    async def invoke(self, query, sessionId) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        lock = await self._lock_session(sessionId)
+        future = loop.run_in_executor(
+            self.executor, self._invoke_sync, query, sessionId
+        )
+        # Released once the thread is done, even if the run is cancelled earlier.
+        future.add_done_callback(lambda _: lock.release())
+        return await asyncio.shield(future)
+
+    def _invoke_sync(self, query, sessionId) -> Dict[str, Any]:
        config = {"configurable": {"thread_id": sessionId}}
        print("call Database Agent")
        self.graph.invoke({"messages": [("user", query)]}, config)
@@ -52,27 +86,53 @@ class DatabaseAgent:
     async def stream(self, query, sessionId) -> AsyncIterable[Dict[str, Any]]:
         inputs = {"messages": [("user", query)]}
         config = {"configurable": {"thread_id": sessionId}}
-
-        for item in self.graph.stream(inputs, config, stream_mode="values"):
-            message = item["messages"][-1]
-            if (
-                isinstance(message, AIMessage)
-                and message.tool_calls
-                and len(message.tool_calls) > 0
-            ):
-                yield {
-                    "is_task_complete": False,
-                    "require_user_input": False,
-                    "content": "Looking up the exchange rates...",
-                }
-            elif isinstance(message, ToolMessage):
-                yield {
-                    "is_task_complete": False,
-                    "require_user_input": False,
-                    "content": "Processing the exchange rates..",
-                }
-
-        yield self.get_agent_response(config)
+        loop = asyncio.get_running_loop()
+        lock = await self._lock_session(sessionId)
+
+        # Every step of the synchronous graph stream runs on the thread pool.
+        items = self.graph.stream(inputs, config, stream_mode="values")
+        done = object()
+        step = None
+        try:
+            while True:
+                step = loop.run_in_executor(self.executor, next, items, done)
+                item = await asyncio.shield(step)
+                if item is done:
+                    break
+                message = item["messages"][-1]
+                if (
+                    isinstance(message, AIMessage)
+                    and message.tool_calls
+                    and len(message.tool_calls) > 0
+                ):
+                    yield {
+                        "is_task_complete": False,
+                        "require_user_input": False,
+                        "content": "Looking up the exchange rates...",
+                    }
+                elif isinstance(message, ToolMessage):
+                    yield {
+                        "is_task_complete": False,
+                        "require_user_input": False,
+                        "content": "Processing the exchange rates..",
+                    }
+
+            step = loop.run_in_executor(
+                self.executor, self.get_agent_response, config
+            )
+            yield await asyncio.shield(step)
+        finally:
+            # On cancellation the current step keeps running in its thread. Once it
+            # is done, the half-consumed generator is closed on the thread pool and
+            # only then is the session released.
+            def close_items(_=None):
+                closed = loop.run_in_executor(self.executor, items.close)
+                closed.add_done_callback(lambda _: lock.release())
+
+            if step is not None and not step.done():
+                step.add_done_callback(close_items)
+            else:
+                close_items()
 
     def get_agent_response(self, config):
         current_state = self.graph.get_state(config)
@@ -1,7 +1,10 @@
 import asyncio
+import hashlib
 import logging
+import time
 from abc import ABC, abstractmethod
-from typing import AsyncIterable, List, Union
+from collections import OrderedDict
+from typing import Any, AsyncIterable, Awaitable, Callable, Coroutine, List, Union
 
 from custom_types import (
     Artifact,
@@ -12,6 +15,7 @@ from custom_types import (
     GetTaskRequest,
     GetTaskResponse,
     InternalError,
+    InvalidParamsError,
     JSONRPCError,
     JSONRPCResponse,
     PushNotificationConfig,
@@ -22,6 +26,8 @@ from custom_types import (
     SetTaskPushNotificationRequest,
     SetTaskPushNotificationResponse,
     Task,
+    TaskArtifactUpdateEvent,
+    TaskCanceledError,
     TaskIdParams,
     TaskNotCancelableError,
     TaskNotFoundError,
@@ -33,12 +39,52 @@ from custom_types import (
     TaskStatus,
     TaskStatusUpdateEvent,
 )
+from sse_queue import SSEQueuePolicy, SSESubscriberQueue, TaskEventLog
+from task_scheduler import TaskRunScheduler, TaskSchedulerPolicy
+from task_store import InMemoryTaskStore, TaskRetentionPolicy, TaskStore
 from utils import new_not_implemented_error
 
 logger = logging.getLogger(__name__)
 
+# States that end an SSE stream (see _run_streaming_agent of the task managers).
+FINAL_TASK_STATES = {
+    TaskState.COMPLETED,
+    TaskState.CANCELED,
+    TaskState.FAILED,
+    TaskState.INPUT_REQUIRED,
+}
+
+# States after which a task may be evicted from the store.
+TERMINAL_TASK_STATES = {TaskState.COMPLETED, TaskState.CANCELED, TaskState.FAILED}
+
+
+class TaskLockManager:
+    """Hands out asyncio locks per task id instead of one global lock.
+
+    Task ids are hashed onto a fixed number of lock shards, so unrelated tasks
+    rarely contend and the number of locks stays bounded no matter how many
+    tasks pass through the manager.
+    """
+
+    def __init__(self, num_shards: int = 256):
+        self._locks = [asyncio.Lock() for _ in range(num_shards)]
+
+    def lock(self, task_id: str) -> asyncio.Lock:
+        return self._locks[hash(task_id) % len(self._locks)]
+
 
 class TaskManager(ABC):
+    async def start(self):
+        """Called once the server's event loop is running."""
+        pass
+
+    async def close(self):
+        """Called on server shutdown."""
+        pass
+
+    def get_metrics(self) -> dict[str, Any]:
+        return {}
+
     @abstractmethod
     async def on_get_task(self, request: GetTaskRequest) -> GetTaskResponse:
         pass
@@ -77,38 +123,273 @@ class TaskManager(ABC):
 
 
 class InMemoryTaskManager(TaskManager):
-    def __init__(self):
-        self.tasks: dict[str, Task] = {}
-        self.push_notification_infos: dict[str, PushNotificationConfig] = {}
-        self.lock = asyncio.Lock()
-        self.task_sse_subscribers: dict[str, List[asyncio.Queue]] = {}
-        self.subscriber_lock = asyncio.Lock()
+    def __init__(
+        self,
+        task_store: TaskStore | None = None,
+        retention_policy: TaskRetentionPolicy | None = None,
+        sse_queue_policy: SSEQueuePolicy | None = None,
+        scheduler_policy: TaskSchedulerPolicy | None = None,
+    ):
+        self.task_store = task_store if task_store is not None else InMemoryTaskStore()
+        self.retention_policy = (
+            retention_policy if retention_policy is not None else TaskRetentionPolicy()
+        )
+        self.sse_queue_policy = (
+            sse_queue_policy if sse_queue_policy is not None else SSEQueuePolicy()
+        )
+        # Writes are serialized per task. Reads take no lock, since a store
+        # access always returns a consistent state.
+        self.task_locks = TaskLockManager()
+        self.task_sse_subscribers: dict[str, List[SSESubscriberQueue]] = {}
+        # Recent SSE events per task for tasks/resubscribe with Last-Event-ID.
+        # They are dropped event_log_ttl seconds after the final event.
+        self.task_event_logs: dict[str, TaskEventLog] = {}
+        self.task_event_log_expiries: dict[str, asyncio.TimerHandle] = {}
+        self.subscriber_locks = TaskLockManager()
+        self.task_store_watchers: dict[SSESubscriberQueue, asyncio.Task] = {}
+        # Counters of finished subscribers; get_metrics adds the active ones.
+        self.sse_dropped_events = 0
+        self.sse_disconnected_subscribers = 0
+        self.task_store_poll_interval = 0.5
+        # Bookkeeping for retention: the size of each task (serialized JSON) and
+        # the terminal tasks in LRU order with the time they finished.
+        self.task_sizes: dict[str, int] = {}
+        self.task_store_bytes = 0
+        self.resized_task_ids: set[str] = set()
+        self.terminal_tasks: OrderedDict[str, float] = OrderedDict()
+        self.eviction_counts = {"ttl": 0, "max_tasks": 0, "max_bytes": 0}
+        self.eviction_task: asyncio.Task | None = None
+        # Running and waiting agent runs per task, so tasks/cancel can stop
+        # them. The scheduler limits how many run at the same time.
+        self.scheduler = TaskRunScheduler(scheduler_policy)
+        self.agent_runs: dict[str, asyncio.Task] = {}
+        self.agent_run_started: dict[str, float] = {}
+        self.cancellation_counts = {"canceled_tasks": 0, "stopped_runs": 0}
+        self.stopped_run_seconds = 0.0
+        # In-flight tasks/send calls per (task id, message), for single-flight.
+        self.inflight_sends: dict[tuple[str, str], asyncio.Task] = {}
+        self.coalesced_sends = 0
+
+    async def start(self):
+        if self.eviction_task is None:
+            self.eviction_task = asyncio.create_task(self._run_eviction_loop())
+
+    async def close(self):
+        if self.eviction_task is not None:
+            self.eviction_task.cancel()
+            try:
+                await self.eviction_task
+            except asyncio.CancelledError:
+                pass
+            self.eviction_task = None
+        for expiry in self.task_event_log_expiries.values():
+            expiry.cancel()
+        self.task_event_log_expiries.clear()
+        agent_runs = list(self.agent_runs.values())
+        for agent_run in agent_runs:
+            agent_run.cancel()
+        if agent_runs:
+            await asyncio.wait(agent_runs)
+        await self.task_store.close()
+
+    def get_metrics(self) -> dict[str, Any]:
+        return {
+            "tasks": len(self.task_sizes),
+            "terminal_tasks": len(self.terminal_tasks),
+            "task_store_bytes": self.task_store_bytes,
+            "evictions": dict(self.eviction_counts),
+            "scheduler": self.scheduler.get_metrics(),
+            "inflight_sends": len(self.inflight_sends),
+            "coalesced_sends": self.coalesced_sends,
+            "cancellations": {
+                **self.cancellation_counts,
+                "stopped_run_seconds": round(self.stopped_run_seconds, 3),
+            },
+            "sse": self._get_sse_metrics(),
+        }
+
+    def _get_sse_metrics(self) -> dict[str, Any]:
+        queues = [
+            queue
+            for subscribers in self.task_sse_subscribers.values()
+            for queue in subscribers
+        ]
+        queues.extend(self.task_store_watchers)
+        return {
+            "event_logs": len(self.task_event_logs),
+            "subscribers": len(queues),
+            "queued_events": sum(queue.qsize() for queue in queues),
+            "max_queue_depth": max((queue.qsize() for queue in queues), default=0),
+            "dropped_events": self.sse_dropped_events
+            + sum(queue.dropped for queue in queues),
+            "disconnected_subscribers": self.sse_disconnected_subscribers
+            + sum(queue.disconnected for queue in queues),
+        }
 
     async def on_get_task(self, request: GetTaskRequest) -> GetTaskResponse:
         logger.info(f"Getting task {request.params.id}")
         task_query_params: TaskQueryParams = request.params
 
-        async with self.lock:
-            task = self.tasks.get(task_query_params.id)
-            if task is None:
-                return GetTaskResponse(id=request.id, error=TaskNotFoundError())
+        task = await self.task_store.get_task(
+            task_query_params.id,
+            history_length=max(task_query_params.historyLength or 0, 0),
+        )
+        if task is None:
+            return GetTaskResponse(id=request.id, error=TaskNotFoundError())
 
-            task_result = self.append_task_history(
-                task, task_query_params.historyLength
-            )
+        if task.id in self.terminal_tasks:
+            self.terminal_tasks.move_to_end(task.id)
+        task_result = self.append_task_history(task, task_query_params.historyLength)
 
         return GetTaskResponse(id=request.id, result=task_result)
 
     async def on_cancel_task(self, request: CancelTaskRequest) -> CancelTaskResponse:
         logger.info(f"Cancelling task {request.params.id}")
         task_id_params: TaskIdParams = request.params
+        task_id = task_id_params.id
+
+        # The task lock is held from stopping the run until CANCELED is stored,
+        # so waiters in this process read the final state. If the task runs in
+        # another worker, update_store there rejects all further agent updates
+        # (TaskCanceledError).
+        async with self.task_locks.lock(task_id):
+            task = await self.task_store.get_task(task_id, history_length=0)
+            if task is None:
+                return CancelTaskResponse(id=request.id, error=TaskNotFoundError())
+            if task.status.state in TERMINAL_TASK_STATES:
+                return CancelTaskResponse(
+                    id=request.id, error=TaskNotCancelableError()
+                )
+
+            stopped_run_seconds = await self._stop_agent_run(task_id)
+            canceled = False
 
-        async with self.lock:
-            task = self.tasks.get(task_id_params.id)
+            def cancel(task: Task | None) -> Task | None:
+                nonlocal canceled
+                # Check again: another worker may have finished the task in the
+                # meantime.
+                if task is None or task.status.state in TERMINAL_TASK_STATES:
+                    return None
+                task.status = TaskStatus(state=TaskState.CANCELED)
+                canceled = True
+                return task
+
+            task = await self.task_store.update_task(task_id, cancel)
             if task is None:
                 return CancelTaskResponse(id=request.id, error=TaskNotFoundError())
+            if not canceled:
+                return CancelTaskResponse(
+                    id=request.id, error=TaskNotCancelableError()
+                )
+            self._track_task(task)
+
+        self.cancellation_counts["canceled_tasks"] += 1
+        if stopped_run_seconds is not None:
+            self.cancellation_counts["stopped_runs"] += 1
+            self.stopped_run_seconds += stopped_run_seconds
+            logger.info(
+                f"Stopped agent run of task {task_id} after {stopped_run_seconds:.2f}s"
+            )
 
-        return CancelTaskResponse(id=request.id, error=TaskNotCancelableError())
+        await self.send_task_notification(task)
+        await self.enqueue_events_for_sse(
+            task_id, TaskStatusUpdateEvent(id=task_id, status=task.status, final=True)
+        )
+        return CancelTaskResponse(
+            id=request.id, result=self.append_task_history(task, 0)
+        )
+
+    def start_agent_run(
+        self,
+        task_id: str,
+        coro: Coroutine,
+        priority: int = 0,
+        session_id: str | None = None,
+    ) -> asyncio.Task:
+        """Schedules the agent work of a task as an asyncio task tasks/cancel can stop.
+
+        The run waits in the scheduler queue until a slot is free and, for a
+        session, until the session's earlier runs are done; the task keeps its
+        current state (SUBMITTED for new tasks) until the run starts.
+        """
+
+        def on_start():
+            self.agent_run_started[task_id] = time.monotonic()
+
+        agent_run = asyncio.create_task(
+            self.scheduler.run(coro, priority, on_start, session_id)
+        )
+        self.agent_runs[task_id] = agent_run
+        agent_run.add_done_callback(
+            lambda _: self._finish_agent_run(task_id, agent_run)
+        )
+        return agent_run
+
+    def _finish_agent_run(self, task_id: str, agent_run: asyncio.Task):
+        if agent_run.cancelled():
+            pass
+        elif isinstance(agent_run.exception(), TaskCanceledError):
+            logger.info(f"Agent run of task {task_id} stopped, task was canceled")
+        elif agent_run.exception() is not None:
+            logger.error(
+                f"Agent run of task {task_id} failed: {agent_run.exception()}"
+            )
+        # Only unregister if no newer run has been registered.
+        if self.agent_runs.get(task_id) is agent_run:
+            del self.agent_runs[task_id]
+            self.agent_run_started.pop(task_id, None)
+
+    async def send_task_single_flight(
+        self,
+        request: SendTaskRequest,
+        send: Callable[[SendTaskRequest], Awaitable[SendTaskResponse]],
+    ) -> SendTaskResponse:
+        """Runs ``send`` once per task id and message while it is in flight.
+
+        A retried tasks/send for the same task and message does not start a second
+        agent run or append the message again; it waits for the original run and
+        gets its response under its own request id.
+        """
+        message = request.params.message.model_dump_json().encode()
+        key = (request.params.id, hashlib.sha256(message).hexdigest())
+        flight = self.inflight_sends.get(key)
+        if flight is None:
+            # A separate asyncio task: if the first caller is cancelled, the run
+            # goes on for the others.
+            flight = asyncio.create_task(send(request))
+            self.inflight_sends[key] = flight
+            flight.add_done_callback(lambda _: self.inflight_sends.pop(key, None))
+        else:
+            self.coalesced_sends += 1
+            logger.info(f"Coalescing duplicate tasks/send for task {key[0]}")
+
+        response = await asyncio.shield(flight)
+        return response.model_copy(update={"id": request.id})
+
+    @staticmethod
+    def get_task_priority(task_send_params: TaskSendParams) -> int:
+        priority = (task_send_params.metadata or {}).get("priority", 0)
+        return priority if isinstance(priority, int) else 0
+
+    async def _stop_agent_run(self, task_id: str) -> float | None:
+        """Cancels an agent run and returns how long it had been running.
+
+        A run that was still queued is stopped after 0 seconds.
+        """
+        agent_run = self.agent_runs.get(task_id)
+        if agent_run is None or agent_run.done():
+            return None
+
+        started = self.agent_run_started.get(task_id)
+        run_seconds = time.monotonic() - started if started is not None else 0.0
+        agent_run.cancel()
+        await asyncio.wait({agent_run})
+        return run_seconds
+
+    async def send_task_notification(
+        self, task: Task, artifacts: list[Artifact] | None = None
+    ):
+        pass
 
     @abstractmethod
     async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
@@ -123,28 +404,30 @@ class InMemoryTaskManager(TaskManager):
     async def set_push_notification_info(
         self, task_id: str, notification_config: PushNotificationConfig
     ):
-        async with self.lock:
-            task = self.tasks.get(task_id)
+        async with self.task_locks.lock(task_id):
+            task = await self.task_store.get_task(task_id, history_length=0)
             if task is None:
                 raise ValueError(f"Task not found for {task_id}")
 
-            self.push_notification_infos[task_id] = notification_config
+            await self.task_store.set_push_notification_info(
+                task_id, notification_config
+            )
 
         return
 
     async def get_push_notification_info(self, task_id: str) -> PushNotificationConfig:
-        async with self.lock:
-            task = self.tasks.get(task_id)
-            if task is None:
-                raise ValueError(f"Task not found for {task_id}")
+        task = await self.task_store.get_task(task_id, history_length=0)
+        if task is None:
+            raise ValueError(f"Task not found for {task_id}")
 
-            return self.push_notification_infos[task_id]
-
-        return
+        notification_info = await self.task_store.get_push_notification_info(task_id)
+        if notification_info is None:
+            raise ValueError(f"Push notification info not found for {task_id}")
+        return notification_info
 
     async def has_push_notification_info(self, task_id: str) -> bool:
-        async with self.lock:
-            return task_id in self.push_notification_infos
+        notification_info = await self.task_store.get_push_notification_info(task_id)
+        return notification_info is not None
 
     async def on_set_task_push_notification(
         self, request: SetTaskPushNotificationRequest
@@ -196,20 +479,25 @@ class InMemoryTaskManager(TaskManager):
 
     async def upsert_task(self, task_send_params: TaskSendParams) -> Task:
         logger.info(f"Upserting task {task_send_params.id}")
-        async with self.lock:
-            task = self.tasks.get(task_send_params.id)
+
+        def upsert(task: Task | None) -> Task:
             if task is None:
-                task = Task(
+                return Task(
                     id=task_send_params.id,
                     sessionId=task_send_params.sessionId,
                     messages=[task_send_params.message],
                     status=TaskStatus(state=TaskState.SUBMITTED),
                     history=[task_send_params.message],
                 )
-                self.tasks[task_send_params.id] = task
-            else:
-                task.history.append(task_send_params.message)
+            task.history.append(task_send_params.message)
+            if task.status.state == TaskState.CANCELED:
+                # A new message resumes a canceled task.
+                task.status = TaskStatus(state=TaskState.SUBMITTED)
+            return task
 
+        async with self.task_locks.lock(task_send_params.id):
+            task = await self.task_store.update_task(task_send_params.id, upsert)
+            self._track_task(task)
             return task
 
     async def on_resubscribe_to_task(
@@ -220,12 +508,18 @@ class InMemoryTaskManager(TaskManager):
     async def update_store(
         self, task_id: str, status: TaskStatus, artifacts: list[Artifact]
     ) -> Task:
-        async with self.lock:
-            try:
-                task = self.tasks[task_id]
-            except KeyError:
+        """Applies an agent update to the stored task.
+
+        Raises TaskCanceledError instead if the task was canceled, possibly by
+        another worker, so a late update never overwrites CANCELED.
+        """
+
+        def update(task: Task | None) -> Task:
+            if task is None:
                 logger.error(f"Task {task_id} not found for updating the task")
                 raise ValueError(f"Task {task_id} not found")
+            if task.status.state == TaskState.CANCELED:
+                raise TaskCanceledError(task)
 
             task.status = status
 
@@ -236,53 +530,247 @@ class InMemoryTaskManager(TaskManager):
                 if task.artifacts is None:
                     task.artifacts = []
                 task.artifacts.extend(artifacts)
+            return task
 
+        async with self.task_locks.lock(task_id):
+            task = await self.task_store.update_task(task_id, update)
+            self._track_task(task)
             return task
 
-    def append_task_history(self, task: Task, historyLength: int | None):
-        new_task = task.model_copy()
-        if historyLength is not None and historyLength > 0:
-            new_task.history = new_task.history[-historyLength:]
+    def _track_task(self, task: Task):
+        self.task_sizes.setdefault(task.id, 0)
+        self.resized_task_ids.add(task.id)
+        if task.status.state in TERMINAL_TASK_STATES:
+            self.terminal_tasks.setdefault(task.id, time.monotonic())
+            self.terminal_tasks.move_to_end(task.id)
         else:
-            new_task.history = []
+            self.terminal_tasks.pop(task.id, None)
+
+    async def _run_eviction_loop(self):
+        while True:
+            await asyncio.sleep(self.retention_policy.eviction_interval)
+            try:
+                await self.evict_tasks()
+            except Exception as e:
+                logger.error(f"Error while evicting tasks: {e}")
+
+    async def evict_tasks(self):
+        policy = self.retention_policy
+
+        # Only recompute the sizes of tasks changed since the last pass.
+        resized_task_ids, self.resized_task_ids = self.resized_task_ids, set()
+        for task_id in resized_task_ids:
+            if task_id not in self.task_sizes:
+                continue
+            task = await self.task_store.get_task(task_id)
+            size = len(task.model_dump_json()) if task is not None else 0
+            self.task_store_bytes += size - self.task_sizes.get(task_id, 0)
+            self.task_sizes[task_id] = size
+
+        if policy.terminal_task_ttl is not None:
+            now = time.monotonic()
+            expired_task_ids = [
+                task_id
+                for task_id, terminal_since in self.terminal_tasks.items()
+                if now - terminal_since > policy.terminal_task_ttl
+            ]
+            for task_id in expired_task_ids:
+                await self._evict_task(task_id, "ttl")
+
+        while (
+            policy.max_tasks is not None
+            and len(self.task_sizes) > policy.max_tasks
+            and self.terminal_tasks
+        ):
+            await self._evict_task(next(iter(self.terminal_tasks)), "max_tasks")
+
+        while (
+            policy.max_bytes is not None
+            and self.task_store_bytes > policy.max_bytes
+            and self.terminal_tasks
+        ):
+            await self._evict_task(next(iter(self.terminal_tasks)), "max_bytes")
+
+    async def _evict_task(self, task_id: str, reason: str):
+        async with self.task_locks.lock(task_id):
+            if task_id not in self.terminal_tasks:
+                # The task was resumed in the meantime.
+                return
+            await self.task_store.delete_task(task_id)
+            del self.terminal_tasks[task_id]
+            self.task_store_bytes -= self.task_sizes.pop(task_id, 0)
+            self.resized_task_ids.discard(task_id)
+
+        async with self.subscriber_locks.lock(task_id):
+            self.task_sse_subscribers.pop(task_id, None)
+            self._drop_event_log(task_id)
 
-        return new_task
+        self.eviction_counts[reason] += 1
+        logger.info(f"Evicted task {task_id} ({reason})")
 
-    async def setup_sse_consumer(self, task_id: str, is_resubscribe: bool = False):
-        async with self.subscriber_lock:
+    def append_task_history(self, task: Task, historyLength: int | None):
+        # Shallow copy with the last historyLength messages: O(historyLength).
+        # The rest of the history is neither copied nor serialized.
+        history = []
+        if historyLength is not None and historyLength > 0 and task.history:
+            history = task.history[-historyLength:]
+
+        return task.model_copy(update={"history": history})
+
+    async def setup_sse_consumer(
+        self,
+        task_id: str,
+        is_resubscribe: bool = False,
+        last_event_id: int | None = None,
+    ):
+        async with self.subscriber_locks.lock(task_id):
             if task_id not in self.task_sse_subscribers:
                 if is_resubscribe:
-                    raise ValueError("Task not found for resubscription")
+                    return await self._setup_task_store_watcher(task_id)
                 else:
                     self.task_sse_subscribers[task_id] = []
-
-            sse_event_queue = asyncio.Queue(maxsize=0)  # <=0 is unlimited
+            if not is_resubscribe:
+                # A new run of the task starts: keep its log and subscribers
+                # until that run's final event.
+                expiry = self.task_event_log_expiries.pop(task_id, None)
+                if expiry is not None:
+                    expiry.cancel()
+
+            sse_event_queue = SSESubscriberQueue(self.sse_queue_policy)
+            event_log = self.task_event_logs.get(task_id)
+            if is_resubscribe and event_log is not None:
+                if event_log.is_final and (
+                    last_event_id is None or last_event_id >= event_log.last_event_id
+                ):
+                    # The stream has already ended: send at least the final
+                    # status.
+                    last_event_id = event_log.last_event_id - 1
+                if last_event_id is not None and not event_log.has_events_after(
+                    last_event_id
+                ):
+                    # Missed events are no longer in the log. Fail rather than
+                    # pass off a stream with gaps as complete.
+                    sse_event_queue.put_nowait(
+                        InvalidParamsError(
+                            message=f"Events after {last_event_id} are no longer "
+                            "available, use tasks/get to fetch the current task"
+                        )
+                    )
+                    return sse_event_queue
+                # Replay and register without an await in between, so no event
+                # is lost or duplicated between the log and the live stream.
+                if last_event_id is not None:
+                    for event_id, event in event_log.events_after(last_event_id):
+                        sse_event_queue.put_nowait(event, event_id)
             self.task_sse_subscribers[task_id].append(sse_event_queue)
             return sse_event_queue
 
-    async def enqueue_events_for_sse(self, task_id, task_update_event):
-        async with self.subscriber_lock:
-            if task_id not in self.task_sse_subscribers:
-                return
+    async def _setup_task_store_watcher(self, task_id: str) -> SSESubscriberQueue:
+        # With several workers the task may run in another process, or its event
+        # log has already expired. The updates are then polled from the task
+        # store.
+        if await self.task_store.get_task(task_id, history_length=0) is None:
+            raise ValueError("Task not found for resubscription")
 
-            current_subscribers = self.task_sse_subscribers[task_id]
-            for subscriber in current_subscribers:
-                await subscriber.put(task_update_event)
+        sse_event_queue = SSESubscriberQueue(self.sse_queue_policy)
+        self.task_store_watchers[sse_event_queue] = asyncio.create_task(
+            self._watch_task_store(task_id, sse_event_queue)
+        )
+        return sse_event_queue
+
+    async def _watch_task_store(
+        self, task_id: str, sse_event_queue: SSESubscriberQueue
+    ):
+        last_status_timestamp = None
+        seen_artifacts = None
+        try:
+            while True:
+                task = await self.task_store.get_task(task_id, history_length=0)
+                if task is None:
+                    sse_event_queue.put_nowait(TaskNotFoundError())
+                    return
+
+                artifacts = task.artifacts or []
+                if seen_artifacts is None:
+                    seen_artifacts = len(artifacts)
+                for artifact in artifacts[seen_artifacts:]:
+                    sse_event_queue.put_nowait(
+                        TaskArtifactUpdateEvent(id=task_id, artifact=artifact)
+                    )
+                seen_artifacts = len(artifacts)
+
+                if task.status.timestamp != last_status_timestamp:
+                    last_status_timestamp = task.status.timestamp
+                    final = task.status.state in FINAL_TASK_STATES
+                    sse_event_queue.put_nowait(
+                        TaskStatusUpdateEvent(
+                            id=task_id, status=task.status, final=final
+                        )
+                    )
+                    if final:
+                        return
+
+                await asyncio.sleep(self.task_store_poll_interval)
+        except Exception as e:
+            logger.error(f"Error while watching task {task_id}: {e}")
+            sse_event_queue.put_nowait(
+                InternalError(message=f"An error occurred while watching the task: {e}")
+            )
+
+    async def enqueue_events_for_sse(self, task_id, task_update_event):
+        # No lock and no await per subscriber: a slow client does not hold up
+        # the others, and the SSEQueuePolicy bounds its queue.
+        event_log = self.task_event_logs.get(task_id)
+        if event_log is None:
+            event_log = TaskEventLog(self.sse_queue_policy.event_log_size)
+            self.task_event_logs[task_id] = event_log
+        event_id = event_log.append(task_update_event)
+        expiry = self.task_event_log_expiries.pop(task_id, None)
+        if expiry is not None:
+            expiry.cancel()
+        if event_log.is_final:
+            loop = asyncio.get_running_loop()
+            self.task_event_log_expiries[task_id] = loop.call_later(
+                self.sse_queue_policy.event_log_ttl, self._expire_event_log, task_id
+            )
+        for subscriber in list(self.task_sse_subscribers.get(task_id, ())):
+            subscriber.put_nowait(task_update_event, event_id)
+
+    def _expire_event_log(self, task_id: str):
+        self._drop_event_log(task_id)
+        # Every remaining subscriber already has the final event in its queue:
+        # new runs cancel the expiry, and resubscribes to a finished stream get
+        # the final event replayed. Without a subscriber list a later
+        # resubscribe falls back to the task store.
+        self.task_sse_subscribers.pop(task_id, None)
+
+    def _drop_event_log(self, task_id: str):
+        expiry = self.task_event_log_expiries.pop(task_id, None)
+        if expiry is not None:
+            expiry.cancel()
+        self.task_event_logs.pop(task_id, None)
 
     async def dequeue_events_for_sse(
-        self, request_id, task_id, sse_event_queue: asyncio.Queue
+        self, request_id, task_id, sse_event_queue: SSESubscriberQueue
     ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
         try:
             while True:
-                event = await sse_event_queue.get()
+                event_id, event = await sse_event_queue.get()
                 if isinstance(event, JSONRPCError):
                     yield SendTaskStreamingResponse(id=request_id, error=event)
                     break
 
-                yield SendTaskStreamingResponse(id=request_id, result=event)
+                yield SendTaskStreamingResponse(
+                    id=request_id, result=event, event_id=event_id
+                )
                 if isinstance(event, TaskStatusUpdateEvent) and event.final:
                     break
         finally:
-            async with self.subscriber_lock:
-                if task_id in self.task_sse_subscribers:
+            async with self.subscriber_locks.lock(task_id):
+                if sse_event_queue in self.task_sse_subscribers.get(task_id, []):
                     self.task_sse_subscribers[task_id].remove(sse_event_queue)
+                watcher = self.task_store_watchers.pop(sse_event_queue, None)
+                if watcher is not None:
+                    watcher.cancel()
+            self.sse_dropped_events += sse_event_queue.dropped
+            self.sse_disconnected_subscribers += sse_event_queue.disconnected
@@ -0,0 +1,106 @@
+"""Response decoding in A2AClient: dict round trip vs. direct JSON validation.
+
+Decodes a large tasks/get response (``--history`` messages and ``--artifacts``
+artifacts) and a stream of small SSE status events, once the former way
+(``Model(**json.loads(data))``) and once with _decode_response, which validates
+the raw JSON bytes or str directly.
+
+    python benchmarks/bench_client_decode.py [--history 5000] [--events 20000]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from client import _decode_response  # noqa: E402
+from custom_types import (  # noqa: E402
+    Artifact,
+    GetTaskResponse,
+    Message,
+    SendTaskStreamingResponse,
+    Task,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+
+def decode_baseline(response_model, data):
+    return response_model(**json.loads(data))
+
+
+def make_task_response(args) -> bytes:
+    return GetTaskResponse(
+        id=1,
+        result=Task(
+            id="task-1",
+            sessionId="session-1",
+            status=TaskStatus(state=TaskState.COMPLETED),
+            history=[
+                Message(
+                    role="user" if i % 2 == 0 else "agent",
+                    parts=[TextPart(text=f"message {i}: " + "lorem ipsum " * 20)],
+                )
+                for i in range(args.history)
+            ],
+            artifacts=[
+                Artifact(parts=[TextPart(text="1 USD = 0.92 EUR. " * 50)], index=i)
+                for i in range(args.artifacts)
+            ],
+        ),
+    ).model_dump_json(exclude_none=True).encode()
+
+
+def make_event(event: int) -> str:
+    # SSE event data arrives as str.
+    return SendTaskStreamingResponse(
+        id=1,
+        result=TaskStatusUpdateEvent(
+            id="task-1",
+            status=TaskStatus(
+                state=TaskState.WORKING,
+                message=Message(role="agent", parts=[TextPart(text=f"step {event}")]),
+            ),
+        ),
+    ).model_dump_json(exclude_none=True)
+
+
+def main(args):
+    task_response = make_task_response(args)
+    events = [make_event(event) for event in range(args.events)]
+    decoders = {
+        "json.loads + Model(**)": decode_baseline,
+        "_decode_response": _decode_response,
+    }
+
+    print(
+        f"tasks/get: {args.history} messages, {args.artifacts} artifacts, "
+        f"{len(task_response) / 1e6:.1f} MB; SSE: {args.events} status events"
+    )
+    print(f"{'decoder':<24}{'tasks/get ms':>14}{'events/s':>12}")
+    for name, decode in decoders.items():
+        decode(GetTaskResponse, task_response)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            decode(GetTaskResponse, task_response)
+        task_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+        start = time.perf_counter()
+        for event in events:
+            decode(SendTaskStreamingResponse, event)
+        events_per_second = len(events) / (time.perf_counter() - start)
+        print(f"{name:<24}{task_ms:>14.1f}{events_per_second:>12.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--history", type=int, default=5000)
+    parser.add_argument("--artifacts", type=int, default=50)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,121 @@
+"""A2AClient calls per second against a local stub agent, pooled vs. per-call client.
+
+Starts a Starlette stub that answers every JSON-RPC request with a completed
+task in a subprocess and runs ``--calls`` tasks/get calls with ``--concurrency``
+in flight. The baseline opens a new httpx.AsyncClient per call, as A2AClient
+did before; the client as shipped reuses its pooled one.
+
+    python benchmarks/bench_client_pool.py [--calls 1000]
+"""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from client import A2AClient  # noqa: E402
+from custom_types import (  # noqa: E402
+    A2AClientHTTPError,
+    GetTaskResponse,
+    JSONRPCRequest,
+    Task,
+    TaskState,
+    TaskStatus,
+)
+
+
+class ClientPerCallA2AClient(A2AClient):
+    async def _send_request(self, request: JSONRPCRequest) -> bytes:
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.post(self.url, json=request.model_dump())
+                response.raise_for_status()
+                return response.content
+        except httpx.HTTPStatusError as e:
+            raise A2AClientHTTPError(e.response.status_code, str(e)) from e
+
+
+async def get_task(request: Request):
+    body = await request.json()
+    return Response(
+        GetTaskResponse(
+            id=body["id"],
+            result=Task(
+                id=body["params"]["id"],
+                sessionId="session-1",
+                status=TaskStatus(state=TaskState.COMPLETED),
+            ),
+        ).model_dump_json(exclude_none=True),
+        media_type="application/json",
+    )
+
+
+def serve(args):
+    app = Starlette(routes=[Route("/", get_task, methods=["POST"])])
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+async def measure(client: A2AClient, args) -> float:
+    async def get_tasks(pending):
+        for call in pending:
+            response = await client.get_task({"id": f"task-{call}"})
+            assert response.result.status.state == TaskState.COMPLETED
+
+    async with client:
+        for _ in range(200):
+            try:
+                await client.get_task({"id": "warmup"})
+                break
+            except httpx.TransportError:
+                await asyncio.sleep(0.05)
+        warmup = iter(range(min(args.calls, 50)))
+        await asyncio.gather(*(get_tasks(warmup) for _ in range(args.concurrency)))
+        pending = iter(range(args.calls))
+        start = time.perf_counter()
+        await asyncio.gather(*(get_tasks(pending) for _ in range(args.concurrency)))
+        return args.calls / (time.perf_counter() - start)
+
+
+def main(args):
+    url = f"http://127.0.0.1:{args.port}/"
+    process = subprocess.Popen(
+        [sys.executable, __file__, "--serve", "--port", str(args.port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        print(f"{args.calls} tasks/get calls, {args.concurrency} in flight")
+        print(f"{'client':<22}{'calls/s':>10}")
+        for name, client in {
+            "new client per call": ClientPerCallA2AClient(url=url),
+            "pooled client": A2AClient(url=url),
+        }.items():
+            rate = asyncio.run(measure(client, args))
+            print(f"{name:<22}{rate:>10.0f}")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args)
+    else:
+        main(args)
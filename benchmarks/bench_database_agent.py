@@ -0,0 +1,126 @@
+"""Parallel tasks/send on the database agent with a blocking LLM call.
+
+The LangGraph graph is replaced by a stub whose invoke blocks its thread for
+``--latency`` seconds, like the synchronous ChatOpenAI call does. ``--tasks``
+tasks/send requests of different sessions go through
+DatabaseAgentTaskManager.on_send_task at the same time. The baseline runs the
+graph on the event loop, as before the thread pool; the agent as shipped runs
+it on its executor. A ticker counts how many 10 ms event-loop ticks were served
+in the meantime.
+
+Needs the agent's dependencies (langchain, langgraph) to be installed; no LLM
+or API key is used.
+
+    python benchmarks/bench_database_agent.py [--tasks 8] [--latency 0.5]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import a2a_wrapper_database_agent  # noqa: E402
+from a2a_wrapper_database_agent import DatabaseAgent  # noqa: E402
+from custom_types import (  # noqa: E402
+    Message,
+    SendTaskRequest,
+    TaskSendParams,
+    TextPart,
+)
+from database_agent import AgentResponse  # noqa: E402
+from push_notification_auth import PushNotificationSenderAuth  # noqa: E402
+from task_manager_database_agent import DatabaseAgentTaskManager  # noqa: E402
+from task_scheduler import TaskSchedulerPolicy  # noqa: E402
+
+TICK = 0.01
+
+
+class BlockingGraph:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def invoke(self, inputs, config):
+        time.sleep(self.latency)
+
+    def get_state(self, config):
+        return SimpleNamespace(
+            values={
+                "structured_response": AgentResponse(
+                    status="completed", message="There are 42 customers."
+                )
+            }
+        )
+
+
+class EventLoopDatabaseAgent(DatabaseAgent):
+    async def invoke(self, query, sessionId):
+        # Before the thread pool: the graph ran directly on the event loop.
+        return self._invoke_sync(query, sessionId)
+
+
+def make_agent(agent_class: type[DatabaseAgent], args) -> DatabaseAgent:
+    a2a_wrapper_database_agent.get_database_agent = lambda memory: BlockingGraph(
+        args.latency
+    )
+    return agent_class(max_workers=args.tasks)
+
+
+async def tick(ticks: list[int]):
+    while True:
+        await asyncio.sleep(TICK)
+        ticks[0] += 1
+
+
+async def measure(agent: DatabaseAgent, args) -> tuple[float, int]:
+    task_manager = DatabaseAgentTaskManager(
+        agent,
+        PushNotificationSenderAuth(),
+        scheduler_policy=TaskSchedulerPolicy(max_concurrent_runs=args.tasks),
+    )
+    requests = [
+        SendTaskRequest(
+            params=TaskSendParams(
+                id=f"task-{task}",
+                sessionId=f"session-{task}",
+                message=Message(
+                    role="user", parts=[TextPart(text="How many customers?")]
+                ),
+            )
+        )
+        for task in range(args.tasks)
+    ]
+    ticks = [0]
+    ticker = asyncio.create_task(tick(ticks))
+    start = time.perf_counter()
+    await asyncio.gather(*(task_manager.on_send_task(r) for r in requests))
+    elapsed = time.perf_counter() - start
+    ticker.cancel()
+    await task_manager.close()
+    agent.executor.shutdown()
+    return elapsed, ticks[0]
+
+
+def main(args):
+    print(
+        f"{args.tasks} parallel tasks/send, {args.latency} s blocking LLM call, "
+        f"{TICK * 1000:.0f} ms loop ticks"
+    )
+    print(f"{'graph runs on':<16}{'wall s':>8}{'ticks served':>14}")
+    for name, agent_class in {
+        "event loop": EventLoopDatabaseAgent,
+        "thread pool": DatabaseAgent,
+    }.items():
+        elapsed, ticks = asyncio.run(measure(make_agent(agent_class, args), args))
+        expected = round(elapsed / TICK)
+        print(f"{name:<16}{elapsed:>8.2f}{f'{ticks}/{expected}':>14}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.5)
+    main(parser.parse_args())
@@ -0,0 +1,192 @@
+"""tasks/send throughput of A2AServer with 1, 2, 4, ... workers on a shared store.
+
+Starts the server in multi-worker mode on a SqliteTaskStore for every worker
+count, sends tasks/send requests with a fixed concurrency and reports
+requests per second and the scaling relative to one worker. The agent is a stub
+that burns ``--agent-cpu-ms`` of CPU per request; it goes through the same
+task-manager path as the real agents (upsert, scheduler, WORKING, COMPLETED).
+
+Scaling is bounded by the number of CPU cores, which is printed first.
+
+    python benchmarks/bench_multi_worker.py [--workers 1 2 4] [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from uuid import uuid4
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from abc_task_manager import InMemoryTaskManager  # noqa: E402
+from custom_types import (  # noqa: E402
+    AgentCapabilities,
+    AgentCard,
+    AgentSkill,
+    Artifact,
+    SendTaskRequest,
+    SendTaskResponse,
+    TaskSendParams,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+from server import A2AServer  # noqa: E402
+from task_store import SqliteTaskStore  # noqa: E402
+
+
+class StubAgentTaskManager(InMemoryTaskManager):
+    def __init__(self, agent_cpu_ms: float, **kwargs):
+        super().__init__(**kwargs)
+        self.agent_cpu_ms = agent_cpu_ms
+
+    async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
+        task_send_params: TaskSendParams = request.params
+        await self.upsert_task(task_send_params)
+        content = await self.start_agent_run(
+            task_send_params.id,
+            self._invoke_agent(task_send_params),
+            session_id=task_send_params.sessionId,
+        )
+        task = await self.update_store(
+            task_send_params.id,
+            TaskStatus(state=TaskState.COMPLETED),
+            [Artifact(parts=[TextPart(text=content)])],
+        )
+        return SendTaskResponse(id=request.id, result=self.append_task_history(task, 0))
+
+    async def on_send_task_subscribe(self, request):
+        raise NotImplementedError
+
+    async def _invoke_agent(self, task_send_params: TaskSendParams) -> str:
+        await self.update_store(
+            task_send_params.id, TaskStatus(state=TaskState.WORKING), None
+        )
+        deadline = time.process_time() + self.agent_cpu_ms / 1000
+        while time.process_time() < deadline:
+            pass
+        return "1 USD = 0.92 EUR"
+
+
+def serve(args):
+    server = A2AServer(
+        host="127.0.0.1",
+        port=args.port,
+        agent_card=AgentCard(
+            name="bench",
+            url=f"http://127.0.0.1:{args.port}/",
+            version="1.0.0",
+            capabilities=AgentCapabilities(),
+            skills=[AgentSkill(id="bench", name="bench")],
+        ),
+        task_manager=StubAgentTaskManager(
+            args.agent_cpu_ms, task_store=SqliteTaskStore(args.task_db)
+        ),
+        workers=args.workers[0],
+    )
+    server.start()
+
+
+async def wait_until_ready(client: httpx.AsyncClient, url: str):
+    for _ in range(200):
+        try:
+            await client.get(url + ".well-known/agent.json")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.05)
+    raise RuntimeError("Server did not start")
+
+
+async def run_load(url: str, requests: int, concurrency: int) -> float:
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        await wait_until_ready(client, url)
+
+        async def send_tasks(pending):
+            for _ in pending:
+                response = await client.post(
+                    url,
+                    json={
+                        "jsonrpc": "2.0",
+                        "id": 1,
+                        "method": "tasks/send",
+                        "params": {
+                            "id": uuid4().hex,
+                            "sessionId": uuid4().hex,
+                            "message": {
+                                "role": "user",
+                                "parts": [{"type": "text", "text": "100 USD in EUR?"}],
+                            },
+                        },
+                    },
+                )
+                assert response.json()["result"]["status"]["state"] == "completed"
+
+        # Warm up, then measure.
+        warmup = iter(range(min(requests, 200)))
+        await asyncio.gather(*(send_tasks(warmup) for _ in range(concurrency)))
+        pending = iter(range(requests))
+        start = time.perf_counter()
+        await asyncio.gather(*(send_tasks(pending) for _ in range(concurrency)))
+        return requests / (time.perf_counter() - start)
+
+
+def main(args):
+    print(f"{os.cpu_count()} CPU cores, agent CPU {args.agent_cpu_ms} ms/request")
+    print(f"{'workers':>8}{'req/s':>10}{'scaling':>10}")
+    baseline = None
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as directory:
+            process = subprocess.Popen(
+                [
+                    sys.executable,
+                    __file__,
+                    "--serve",
+                    "--workers",
+                    str(workers),
+                    "--port",
+                    str(args.port),
+                    "--agent-cpu-ms",
+                    str(args.agent_cpu_ms),
+                    "--task-db",
+                    os.path.join(directory, "tasks.db"),
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                rate = asyncio.run(
+                    run_load(
+                        f"http://127.0.0.1:{args.port}/",
+                        args.requests,
+                        args.concurrency,
+                    )
+                )
+            finally:
+                process.terminate()
+                process.wait()
+        baseline = baseline or rate
+        print(f"{workers:>8}{rate:>10.0f}{rate / baseline:>9.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--agent-cpu-ms", type=float, default=2.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--task-db")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args)
+    else:
+        main(args)
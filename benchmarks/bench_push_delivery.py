@@ -0,0 +1,125 @@
+"""Push notification throughput against a local webhook, pooled vs. per-call client.
+
+Starts a Starlette webhook that accepts every notification in a subprocess and
+sends ``--notifications`` signed notifications with ``--concurrency`` in
+flight. The baseline opens a new httpx.AsyncClient (and with it a new
+connection and SSL context) per notification, as the sender did before; the
+sender as shipped reuses its pooled client.
+
+    python benchmarks/bench_push_delivery.py [--notifications 1000]
+"""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from push_notification_auth import PushNotificationSenderAuth  # noqa: E402
+
+
+class ClientPerCallSenderAuth(PushNotificationSenderAuth):
+    async def send_push_notification(self, url: str, data: dict[str, Any]) -> bool:
+        body = self._serialize_request_body(data)
+        headers = {
+            "Authorization": f"Bearer {self._generate_jwt(body)}",
+            "Content-Type": "application/json",
+        }
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.post(url, content=body, headers=headers)
+                response.raise_for_status()
+            return True
+        except Exception:
+            return False
+
+
+async def webhook(request: Request):
+    await request.body()
+    return Response(status_code=200)
+
+
+def serve(args):
+    app = Starlette(routes=[Route("/", webhook, methods=["POST"])])
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+async def wait_until_ready(url: str):
+    async with httpx.AsyncClient() as client:
+        for _ in range(200):
+            try:
+                await client.post(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.05)
+    raise RuntimeError("Webhook did not start")
+
+
+async def measure(sender: PushNotificationSenderAuth, url: str, args) -> float:
+    sender.generate_jwk(args.algorithm)
+    data = {"id": "task-1", "status": {"state": "completed"}}
+
+    async def send_notifications(pending):
+        for _ in pending:
+            assert await sender.send_push_notification(url, data)
+
+    warmup = iter(range(min(args.notifications, 50)))
+    await asyncio.gather(*(send_notifications(warmup) for _ in range(args.concurrency)))
+    pending = iter(range(args.notifications))
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(send_notifications(pending) for _ in range(args.concurrency))
+    )
+    elapsed = time.perf_counter() - start
+    await sender.close()
+    return args.notifications / elapsed
+
+
+def main(args):
+    url = f"http://127.0.0.1:{args.port}/"
+    process = subprocess.Popen(
+        [sys.executable, __file__, "--serve", "--port", str(args.port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        asyncio.run(wait_until_ready(url))
+        print(
+            f"{args.notifications} {args.algorithm} notifications, "
+            f"{args.concurrency} in flight"
+        )
+        print(f"{'client':<22}{'notifications/s':>16}")
+        for name, sender in {
+            "new client per call": ClientPerCallSenderAuth(),
+            "pooled client": PushNotificationSenderAuth(),
+        }.items():
+            rate = asyncio.run(measure(sender, url, args))
+            print(f"{name:<22}{rate:>16.0f}")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notifications", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--algorithm", default="RS256")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args)
+    else:
+        main(args)
@@ -0,0 +1,95 @@
+"""Push notifications signed per core-second, by signing algorithm.
+
+Measures what the sender does per notification before the HTTP request:
+serializing the payload, hashing it and signing the JWT (_serialize_request_body
+and _generate_jwt of PushNotificationSenderAuth). The baseline is the former
+path: the digest over one json.dumps, a second json.dumps for the request body
+(as httpx did for ``json=``) and an RS256 signature. Times are process time, so
+the rates are per core-second.
+
+    python benchmarks/bench_push_signing.py [--notifications 2000]
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import jwt
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from custom_types import (  # noqa: E402
+    Artifact,
+    Message,
+    Task,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+from push_notification_auth import (  # noqa: E402
+    SIGNING_KEY_PARAMS,
+    PushNotificationSenderAuth,
+)
+
+
+def make_payload() -> dict[str, Any]:
+    # A completed task of about 1 KB, as sent in payloadMode "task".
+    return Task(
+        id="task-1",
+        sessionId="session-1",
+        status=TaskStatus(
+            state=TaskState.COMPLETED,
+            message=Message(role="agent", parts=[TextPart(text="Done. " * 20)]),
+        ),
+        artifacts=[Artifact(parts=[TextPart(text="1 USD = 0.92 EUR. " * 30)])],
+    ).model_dump(exclude_none=True)
+
+
+def sign_baseline(sender: PushNotificationSenderAuth, data: dict[str, Any]):
+    request_body_sha256 = sender._calculate_request_body_sha256(data)
+    json.dumps(data).encode()
+    jwt.encode(
+        {"iat": int(time.time()), "request_body_sha256": request_body_sha256},
+        key=sender.private_key_jwk.key,
+        headers={"kid": sender.private_key_jwk.key_id},
+        algorithm="RS256",
+    )
+
+
+def sign(sender: PushNotificationSenderAuth, data: dict[str, Any]):
+    sender._generate_jwt(sender._serialize_request_body(data))
+
+
+def measure(sign_notification, sender, data, notifications: int) -> float:
+    sign_notification(sender, data)
+    start = time.process_time()
+    for _ in range(notifications):
+        sign_notification(sender, data)
+    return notifications / (time.process_time() - start)
+
+
+def main(args):
+    data = make_payload()
+    print(
+        f"{len(json.dumps(data))} byte payload, {args.notifications} notifications"
+    )
+    print(f"{'algorithm':<18}{'notifications/core-s':>22}")
+    sender = PushNotificationSenderAuth()
+    sender.generate_jwk("RS256")
+    rate = measure(sign_baseline, sender, data, args.notifications)
+    print(f"{'RS256 (before)':<18}{rate:>22.0f}")
+    for algorithm in SIGNING_KEY_PARAMS:
+        sender = PushNotificationSenderAuth()
+        sender.generate_jwk(algorithm)
+        rate = measure(sign, sender, data, args.notifications)
+        print(f"{algorithm:<18}{rate:>22.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notifications", type=int, default=2000)
+    main(parser.parse_args())
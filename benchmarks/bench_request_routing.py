@@ -0,0 +1,135 @@
+"""Per-request dispatch overhead of A2AServer: union validation vs. routing table.
+
+Compares the former dispatch (validate against the whole A2ARequest union, then
+an isinstance chain) with the method-keyed routing table in server.py. At
+10k req/s a worker has 100 µs per request, so the output also shows which share
+of that budget goes into dispatch alone.
+
+    python benchmarks/bench_request_routing.py [--requests 10000]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from abc_task_manager import InMemoryTaskManager  # noqa: E402
+from custom_types import (  # noqa: E402
+    A2ARequest,
+    AgentCapabilities,
+    AgentCard,
+    AgentSkill,
+    CancelTaskRequest,
+    GetTaskPushNotificationRequest,
+    GetTaskRequest,
+    JSONRPCResponse,
+    SendTaskRequest,
+    SendTaskStreamingRequest,
+    SetTaskPushNotificationRequest,
+    TaskResubscriptionRequest,
+)
+from server import A2AServer  # noqa: E402
+
+BUDGET_US = 100.0  # 10k req/s on one core
+
+
+class NoopTaskManager(InMemoryTaskManager):
+    async def _respond(self, request):
+        return JSONRPCResponse(id=request.id)
+
+    on_get_task = on_send_task = on_send_task_subscribe = _respond
+    on_cancel_task = on_set_task_push_notification = _respond
+    on_get_task_push_notification = on_resubscribe_to_task = _respond
+
+
+def make_bodies() -> dict[str, dict]:
+    message = {"role": "user", "parts": [{"type": "text", "text": "100 USD in EUR?"}]}
+    return {
+        "tasks/get": {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "tasks/get",
+            "params": {"id": "task-1", "historyLength": 5},
+        },
+        "tasks/send": {
+            "jsonrpc": "2.0",
+            "id": 2,
+            "method": "tasks/send",
+            "params": {"id": "task-1", "sessionId": "s-1", "message": message},
+        },
+        "tasks/resubscribe": {
+            "jsonrpc": "2.0",
+            "id": 3,
+            "method": "tasks/resubscribe",
+            "params": {"id": "task-1"},
+        },
+    }
+
+
+async def dispatch_union(task_manager, body: dict):
+    # Dispatch as before the routing table.
+    request = A2ARequest.validate_python(body)
+    if isinstance(request, GetTaskRequest):
+        return await task_manager.on_get_task(request)
+    elif isinstance(request, SendTaskRequest):
+        return await task_manager.on_send_task(request)
+    elif isinstance(request, SendTaskStreamingRequest):
+        return await task_manager.on_send_task_subscribe(request)
+    elif isinstance(request, CancelTaskRequest):
+        return await task_manager.on_cancel_task(request)
+    elif isinstance(request, SetTaskPushNotificationRequest):
+        return await task_manager.on_set_task_push_notification(request)
+    elif isinstance(request, GetTaskPushNotificationRequest):
+        return await task_manager.on_get_task_push_notification(request)
+    elif isinstance(request, TaskResubscriptionRequest):
+        return await task_manager.on_resubscribe_to_task(request)
+    raise ValueError(f"Unexpected request type: {type(request)}")
+
+
+async def dispatch_routes(server: A2AServer, body: dict):
+    request, handler = server._parse_request(body)
+    return await handler(request)
+
+
+async def measure(dispatch, target, body: dict, requests: int) -> float:
+    for _ in range(min(requests, 1000)):
+        await dispatch(target, body)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await dispatch(target, body)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def main(requests: int):
+    task_manager = NoopTaskManager()
+    server = A2AServer(
+        agent_card=AgentCard(
+            name="bench",
+            url="http://localhost",
+            version="1.0.0",
+            capabilities=AgentCapabilities(),
+            skills=[AgentSkill(id="bench", name="bench")],
+        ),
+        task_manager=task_manager,
+    )
+
+    print(f"{requests} requests per method, µs per request (share of {BUDGET_US:.0f} µs)")
+    print(f"{'method':<20}{'union + isinstance':>24}{'routing table':>24}{'speedup':>10}")
+    for method, body in make_bodies().items():
+        before = await measure(dispatch_union, task_manager, body, requests)
+        after = await measure(dispatch_routes, server, body, requests)
+        print(
+            f"{method:<20}"
+            f"{before:>12.2f} ({before / BUDGET_US:>6.1%})"
+            f"{after:>12.2f} ({after / BUDGET_US:>6.1%})"
+            f"{before / after:>9.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=10000)
+    asyncio.run(main(parser.parse_args().requests))
@@ -0,0 +1,98 @@
+"""Throughput of JSON-RPC response rendering for large GetTaskResponse payloads.
+
+Compares the former path (model_dump to a dict, then JSONResponse re-encodes it
+with the stdlib json module), orjson on the dumped dict, and the current
+model_dump_json path in A2AServer._create_json_response.
+
+    python benchmarks/bench_response_serialization.py [--history 10 200 2000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from custom_types import (  # noqa: E402
+    Artifact,
+    GetTaskResponse,
+    Message,
+    Task,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+from server import A2AServer  # noqa: E402
+
+
+def make_response(history_length: int) -> GetTaskResponse:
+    history = [
+        Message(
+            role="user" if i % 2 == 0 else "agent",
+            parts=[TextPart(text=f"message {i}: " + "lorem ipsum dolor sit amet " * 8)],
+        )
+        for i in range(history_length)
+    ]
+    task = Task(
+        id="task-1",
+        sessionId="session-1",
+        status=TaskStatus(state=TaskState.COMPLETED),
+        artifacts=[Artifact(parts=[TextPart(text="1 USD = 0.92 EUR")], index=0)],
+        history=history,
+    )
+    return GetTaskResponse(id=1, result=task)
+
+
+def render_json_response(response: GetTaskResponse) -> bytes:
+    return JSONResponse(response.model_dump(exclude_none=True)).body
+
+
+def render_orjson(response: GetTaskResponse) -> bytes:
+    return Response(
+        content=orjson.dumps(response.model_dump(exclude_none=True)),
+        media_type="application/json",
+    ).body
+
+
+SERVER = A2AServer()
+
+
+def render_model_dump_json(response: GetTaskResponse) -> bytes:
+    return SERVER._create_json_response(response).body
+
+
+def measure(render, response: GetTaskResponse, seconds: float = 1.0) -> float:
+    render(response)
+    rendered = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < seconds:
+        render(response)
+        rendered += 1
+    return rendered / elapsed
+
+
+def main(history_lengths: list[int]):
+    renderers = {
+        "model_dump + JSONResponse": render_json_response,
+        "model_dump + orjson": render_orjson,
+        "model_dump_json": render_model_dump_json,
+    }
+    print(f"{'history':>8}{'size':>10}" + "".join(f"{name:>28}" for name in renderers))
+    for history_length in history_lengths:
+        response = make_response(history_length)
+        size = len(render_model_dump_json(response))
+        rates = [measure(render, response) for render in renderers.values()]
+        print(
+            f"{history_length:>8}{size / 1024:>8.0f}KB"
+            + "".join(f"{rate:>22.0f} resp/s" for rate in rates)
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--history", type=int, nargs="+", default=[10, 200, 2000])
+    main(parser.parse_args().history)
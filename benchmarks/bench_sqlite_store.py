@@ -0,0 +1,110 @@
+"""Status-transition throughput of SqliteTaskStore with and without group commit.
+
+Runs ``--tasks`` concurrent tasks that each go through ``--transitions``
+status updates via InMemoryTaskManager.update_store (the path
+_run_streaming_agent uses). The baseline commits every write in its own
+transaction; the store as shipped commits all writes that arrive while a commit
+is running in one transaction. The in-memory store is shown for reference.
+
+    python benchmarks/bench_sqlite_store.py [--tasks 200] [--transitions 10]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from abc_task_manager import InMemoryTaskManager  # noqa: E402
+from custom_types import (  # noqa: E402
+    Message,
+    TaskSendParams,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+from task_store import InMemoryTaskStore, SqliteTaskStore  # noqa: E402
+
+
+class CommitPerWriteTaskStore(SqliteTaskStore):
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.commits = 0
+
+    async def _write(self, key, write):
+        # Without group commit: every write is its own transaction.
+        self.commits += 1
+        await asyncio.to_thread(self._execute_batch, [write])
+
+
+class CountingTaskStore(SqliteTaskStore):
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.commits = 0
+
+    def _execute_batch(self, writes):
+        self.commits += 1
+        super()._execute_batch(writes)
+
+
+class BenchTaskManager(InMemoryTaskManager):
+    async def on_send_task(self, request):
+        raise NotImplementedError
+
+    async def on_send_task_subscribe(self, request):
+        raise NotImplementedError
+
+    async def run_task(self, task_id: str, transitions: int):
+        await self.upsert_task(
+            TaskSendParams(
+                id=task_id,
+                sessionId=task_id,
+                message=Message(role="user", parts=[TextPart(text="100 USD in EUR?")]),
+            )
+        )
+        for transition in range(transitions):
+            state = (
+                TaskState.COMPLETED if transition == transitions - 1 else TaskState.WORKING
+            )
+            await self.update_store(task_id, TaskStatus(state=state), None)
+
+
+async def measure(make_store, args) -> tuple[float, int | None]:
+    with tempfile.TemporaryDirectory() as directory:
+        task_store = make_store(os.path.join(directory, "tasks.db"))
+        task_manager = BenchTaskManager(task_store=task_store)
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                task_manager.run_task(f"task-{task}", args.transitions)
+                for task in range(args.tasks)
+            )
+        )
+        elapsed = time.perf_counter() - start
+        await task_manager.close()
+    writes = args.tasks * (args.transitions + 1)
+    return writes / elapsed, getattr(task_store, "commits", None)
+
+
+def main(args):
+    stores = {
+        "in-memory": lambda path: InMemoryTaskStore(),
+        "sqlite, commit per write": CommitPerWriteTaskStore,
+        "sqlite, group commit": CountingTaskStore,
+    }
+    print(f"{args.tasks} tasks x {args.transitions} transitions")
+    print(f"{'store':<28}{'writes/s':>10}{'commits':>10}")
+    for name, make_store in stores.items():
+        rate, commits = asyncio.run(measure(make_store, args))
+        print(f"{name:<28}{rate:>10.0f}{commits if commits is not None else '-':>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--transitions", type=int, default=10)
+    main(parser.parse_args())
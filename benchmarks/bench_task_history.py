@@ -0,0 +1,108 @@
+"""tasks/get latency for a task with a long history (10k messages by default).
+
+Compares the former path (load the task with its full history, copy it and
+slice the history) with the current one (load only the requested window from
+the store and slice without copying the history) for the in-memory and the
+SQLite task store, at several historyLength values.
+
+    python benchmarks/bench_task_history.py [--messages 10000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from abc_task_manager import InMemoryTaskManager  # noqa: E402
+from custom_types import (  # noqa: E402
+    GetTaskRequest,
+    GetTaskResponse,
+    Message,
+    Task,
+    TaskQueryParams,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+from task_store import InMemoryTaskStore, SqliteTaskStore  # noqa: E402
+
+
+class BenchTaskManager(InMemoryTaskManager):
+    async def on_send_task(self, request):
+        raise NotImplementedError
+
+    async def on_send_task_subscribe(self, request):
+        raise NotImplementedError
+
+    async def on_get_task_full_history(self, request: GetTaskRequest):
+        # tasks/get as before: load the full history, copy the task, slice.
+        task = await self.task_store.get_task(request.params.id)
+        task_result = task.model_copy()
+        history_length = request.params.historyLength
+        if history_length is not None and history_length > 0:
+            task_result.history = task_result.history[-history_length:]
+        else:
+            task_result.history = []
+        return GetTaskResponse(id=request.id, result=task_result)
+
+
+def make_task(messages: int) -> Task:
+    return Task(
+        id="task-1",
+        sessionId="session-1",
+        status=TaskStatus(state=TaskState.COMPLETED),
+        history=[
+            Message(
+                role="user" if i % 2 == 0 else "agent",
+                parts=[TextPart(text=f"message {i}: " + "lorem ipsum " * 8)],
+            )
+            for i in range(messages)
+        ],
+    )
+
+
+async def measure_ms(get_task, request: GetTaskRequest, repeat: int) -> float:
+    await get_task(request)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        response = await get_task(request)
+        response.model_dump_json(exclude_none=True)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+async def main(args):
+    print(f"{args.messages} messages, ms per tasks/get incl. serialization")
+    print(f"{'store':<8}{'historyLength':>14}{'full history':>14}{'window':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        stores = {
+            "memory": InMemoryTaskStore(),
+            "sqlite": SqliteTaskStore(os.path.join(directory, "tasks.db")),
+        }
+        for store_name, task_store in stores.items():
+            task_manager = BenchTaskManager(task_store=task_store)
+            await task_store.save_task(make_task(args.messages))
+            for history_length in args.history_length:
+                request = GetTaskRequest(
+                    params=TaskQueryParams(id="task-1", historyLength=history_length)
+                )
+                before = await measure_ms(
+                    task_manager.on_get_task_full_history, request, args.repeat
+                )
+                after = await measure_ms(task_manager.on_get_task, request, args.repeat)
+                print(
+                    f"{store_name:<8}{history_length:>14}{before:>14.2f}{after:>10.2f}"
+                )
+            await task_manager.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--history-length", type=int, nargs="+", default=[0, 10, 100])
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,115 @@
+"""Lock contention of many parallel streaming agent loops.
+
+Runs ``--streams`` loops shaped like _run_streaming_agent of the task managers
+(update_store, SSE fan-out to a subscriber and a tasks/get per update) at the
+same time. The run is measured twice: with a single lock shard, which
+serializes all writes like the former global lock, and with the default
+per-task lock shards.
+
+    python benchmarks/bench_task_locks.py [--streams 200] [--store memory sqlite]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from abc_task_manager import InMemoryTaskManager, TaskLockManager  # noqa: E402
+from custom_types import (  # noqa: E402
+    GetTaskRequest,
+    Message,
+    TaskQueryParams,
+    TaskSendParams,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+from task_store import InMemoryTaskStore, SqliteTaskStore  # noqa: E402
+
+
+class StreamingTaskManager(InMemoryTaskManager):
+    async def on_send_task(self, request):
+        raise NotImplementedError
+
+    async def on_send_task_subscribe(self, request):
+        raise NotImplementedError
+
+    async def run_stream(self, task_id: str, updates: int):
+        await self.upsert_task(
+            TaskSendParams(
+                id=task_id,
+                sessionId=task_id,
+                message=Message(role="user", parts=[TextPart(text="100 USD in EUR?")]),
+            )
+        )
+        sse_event_queue = await self.setup_sse_consumer(task_id)
+        consumer = asyncio.create_task(self._consume(task_id, sse_event_queue))
+        for update in range(updates):
+            final = update == updates - 1
+            status = TaskStatus(
+                state=TaskState.COMPLETED if final else TaskState.WORKING,
+                message=Message(role="agent", parts=[TextPart(text=f"step {update}")]),
+            )
+            await self.update_store(task_id, status, None)
+            await self.enqueue_events_for_sse(
+                task_id, TaskStatusUpdateEvent(id=task_id, status=status, final=final)
+            )
+            await self.on_get_task(
+                GetTaskRequest(params=TaskQueryParams(id=task_id, historyLength=1))
+            )
+        await consumer
+
+    async def _consume(self, task_id: str, sse_event_queue):
+        async for _ in self.dequeue_events_for_sse(1, task_id, sse_event_queue):
+            pass
+
+
+async def measure(store_name: str, num_shards: int | None, args) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        if store_name == "sqlite":
+            task_store = SqliteTaskStore(os.path.join(directory, "tasks.db"))
+        else:
+            task_store = InMemoryTaskStore()
+        task_manager = StreamingTaskManager(task_store=task_store)
+        if num_shards is not None:
+            task_manager.task_locks = TaskLockManager(num_shards)
+            task_manager.subscriber_locks = TaskLockManager(num_shards)
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                task_manager.run_stream(f"task-{stream}", args.updates)
+                for stream in range(args.streams)
+            )
+        )
+        elapsed = time.perf_counter() - start
+        await task_manager.close()
+    return args.streams * args.updates / elapsed
+
+
+def main(args):
+    print(f"{args.streams} streams x {args.updates} updates, updates/s")
+    print(f"{'store':<8}{'single lock':>14}{'per-task locks':>16}{'speedup':>10}")
+    for store_name in args.store:
+        single = asyncio.run(measure(store_name, 1, args))
+        sharded = asyncio.run(measure(store_name, None, args))
+        print(
+            f"{store_name:<8}{single:>14.0f}{sharded:>16.0f}"
+            f"{sharded / single:>9.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--updates", type=int, default=20)
+    parser.add_argument(
+        "--store", nargs="+", choices=["memory", "sqlite"], default=["memory", "sqlite"]
+    )
+    main(parser.parse_args())
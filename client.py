@@ -1,8 +1,8 @@
-import json
-from typing import Any, AsyncIterable
+from typing import Any, AsyncIterable, TypeVar
 
 import httpx
-from httpx_sse import connect_sse
+from httpx_sse import aconnect_sse
+from pydantic import BaseModel, ValidationError
 
 from custom_types import (
     A2AClientHTTPError,
@@ -23,66 +23,127 @@ from custom_types import (
     SetTaskPushNotificationResponse,
 )
 
+ResponseT = TypeVar("ResponseT", bound=BaseModel)
+
+
+def _decode_response(response_model: type[ResponseT], data: bytes | str) -> ResponseT:
+    # Validate straight from the JSON bytes, without an intermediate dict from
+    # json.loads.
+    try:
+        return response_model.model_validate_json(data)
+    except ValidationError as e:
+        if any(error["type"] == "json_invalid" for error in e.errors()):
+            raise A2AClientJSONError(str(e)) from e
+        raise
+
 
 class A2AClient:
-    def __init__(self, agent_card: AgentCard = None, url: str = None):
+    """JSON-RPC client for an A2A agent.
+
+    All calls share one pooled ``httpx.AsyncClient``, so connections to the
+    agent are kept alive between calls. ``http2=True`` requires the optional
+    ``h2`` package. Use the client as an async context manager, or call
+    ``close()``, to release the connections.
+    """
+
+    def __init__(
+        self,
+        agent_card: AgentCard = None,
+        url: str = None,
+        timeout: float = 30.0,
+        limits: httpx.Limits | None = None,
+        http2: bool = False,
+    ):
         if agent_card:
             self.url = agent_card.url
         elif url:
             self.url = url
         else:
             raise ValueError("Must provide either agent_card or url")
+        self.timeout = timeout
+        self.limits = (
+            limits
+            if limits is not None
+            else httpx.Limits(
+                max_connections=100, max_keepalive_connections=20, keepalive_expiry=30
+            )
+        )
+        self.http2 = http2
+        self._client: httpx.AsyncClient | None = None
+
+    async def __aenter__(self) -> "A2AClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout, limits=self.limits, http2=self.http2
+            )
+        return self._client
 
     async def send_task(self, payload: dict[str, Any]) -> SendTaskResponse:
         request = SendTaskRequest(params=payload)
-        return SendTaskResponse(**await self._send_request(request))
+        return _decode_response(SendTaskResponse, await self._send_request(request))
 
     async def send_task_streaming(
         self, payload: dict[str, Any]
     ) -> AsyncIterable[SendTaskStreamingResponse]:
         request = SendTaskStreamingRequest(params=payload)
-        with httpx.Client(timeout=None) as client:
-            with connect_sse(
-                client, "POST", self.url, json=request.model_dump()
-            ) as event_source:
-                try:
-                    for sse in event_source.iter_sse():
-                        yield SendTaskStreamingResponse(**json.loads(sse.data))
-                except json.JSONDecodeError as e:
-                    raise A2AClientJSONError(str(e)) from e
-                except httpx.RequestError as e:
-                    raise A2AClientHTTPError(400, str(e)) from e
-
-    async def _send_request(self, request: JSONRPCRequest) -> dict[str, Any]:
-        async with httpx.AsyncClient() as client:
+        # No read timeout: the agent may work for any amount of time between two
+        # events. Events are only read when the caller asks for the next one, so
+        # a slow consumer slows the server down through TCP backpressure.
+        async with aconnect_sse(
+            self._get_client(),
+            "POST",
+            self.url,
+            json=request.model_dump(),
+            timeout=httpx.Timeout(self.timeout, read=None),
+        ) as event_source:
             try:
-                # Image generation could take time, adding timeout
-                response = await client.post(
-                    self.url, json=request.model_dump(), timeout=30
-                )
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                raise A2AClientHTTPError(e.response.status_code, str(e)) from e
-            except json.JSONDecodeError as e:
-                raise A2AClientJSONError(str(e)) from e
+                async for sse in event_source.aiter_sse():
+                    yield _decode_response(SendTaskStreamingResponse, sse.data)
+            except httpx.RequestError as e:
+                raise A2AClientHTTPError(400, str(e)) from e
+
+    async def _send_request(self, request: JSONRPCRequest) -> bytes:
+        try:
+            # Image generation could take time, adding timeout
+            response = await self._get_client().post(
+                self.url, json=request.model_dump()
+            )
+            response.raise_for_status()
+            return response.content
+        except httpx.HTTPStatusError as e:
+            raise A2AClientHTTPError(e.response.status_code, str(e)) from e
 
     async def get_task(self, payload: dict[str, Any]) -> GetTaskResponse:
         request = GetTaskRequest(params=payload)
-        return GetTaskResponse(**await self._send_request(request))
+        return _decode_response(GetTaskResponse, await self._send_request(request))
 
     async def cancel_task(self, payload: dict[str, Any]) -> CancelTaskResponse:
         request = CancelTaskRequest(params=payload)
-        return CancelTaskResponse(**await self._send_request(request))
+        return _decode_response(CancelTaskResponse, await self._send_request(request))
 
     async def set_task_callback(
         self, payload: dict[str, Any]
     ) -> SetTaskPushNotificationResponse:
         request = SetTaskPushNotificationRequest(params=payload)
-        return SetTaskPushNotificationResponse(**await self._send_request(request))
+        return _decode_response(
+            SetTaskPushNotificationResponse, await self._send_request(request)
+        )
 
     async def get_task_callback(
         self, payload: dict[str, Any]
     ) -> GetTaskPushNotificationResponse:
         request = GetTaskPushNotificationRequest(params=payload)
-        return GetTaskPushNotificationResponse(**await self._send_request(request))
+        return _decode_response(
+            GetTaskPushNotificationResponse, await self._send_request(request)
+        )
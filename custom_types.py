@@ -121,6 +121,10 @@ class PushNotificationConfig(BaseModel):
     url: str
     token: str | None = None
     authentication: AuthenticationInfo | None = None
+    # "delta": send only the status or artifact event instead of the whole task.
+    payloadMode: Literal["task", "delta"] = "task"
+    # Seconds within which consecutive WORKING updates are coalesced.
+    coalesceWindow: float | None = None
 
 
 class TaskIdParams(BaseModel):
@@ -132,6 +136,10 @@ class TaskQueryParams(TaskIdParams):
     historyLength: int | None = None
 
 
+class TaskResubscriptionParams(TaskIdParams):
+    lastEventId: int | None = None
+
+
 class TaskSendParams(BaseModel):
     id: str
     sessionId: str = Field(default_factory=lambda: uuid4().hex)
@@ -187,6 +195,9 @@ class SendTaskStreamingRequest(JSONRPCRequest):
 
 class SendTaskStreamingResponse(JSONRPCResponse):
     result: TaskStatusUpdateEvent | TaskArtifactUpdateEvent | None = None
+    # Sequence number in the task's event log; sent as the SSE "id:", not in the
+    # JSON.
+    event_id: int | None = Field(default=None, exclude=True)
 
 
 class GetTaskRequest(JSONRPCRequest):
@@ -227,7 +238,7 @@ class GetTaskPushNotificationResponse(JSONRPCResponse):
 
 class TaskResubscriptionRequest(JSONRPCRequest):
     method: Literal["tasks/resubscribe",] = "tasks/resubscribe"
-    params: TaskIdParams
+    params: TaskResubscriptionParams
 
 
 A2ARequest = TypeAdapter(
@@ -365,6 +376,14 @@ class A2AClientJSONError(A2AClientError):
         super().__init__(f"JSON Error: {message}")
 
 
+class TaskCanceledError(Exception):
+    """Raised when an update targets a task that was canceled in the meantime."""
+
+    def __init__(self, task: Task):
+        self.task = task
+        super().__init__(f"Task {task.id} was canceled")
+
+
 class MissingAPIKeyError(Exception):
     """Exception for missing API key."""
 
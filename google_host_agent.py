@@ -32,7 +32,11 @@ TaskUpdateCallback = Callable[[TaskCallbackArg], Task]
 
 
 class RemoteAgentConnections:
-    """A class to hold the connections to the remote agents."""
+    """A class to hold the connections to the remote agents.
+
+    The A2AClient keeps a connection pool open; call ``close()`` or use the
+    connections as an async context manager to release it.
+    """
 
     def __init__(self, agent_card: AgentCard):
         self.agent_client = A2AClient(agent_card)
@@ -42,6 +46,15 @@ class RemoteAgentConnections:
         self.conversation = None
         self.pending_tasks = set()
 
+    async def __aenter__(self) -> "RemoteAgentConnections":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        await self.agent_client.close()
+
     def get_agent(self) -> AgentCard:
         return self.card
 
@@ -133,6 +146,8 @@ class HostAgent:
     ):
         self.task_callback = task_callback
         self.remote_agent_connections: dict[str, RemoteAgentConnections] = {}
+        # Connections replaced by register_agent_card, closed in close().
+        self._replaced_connections: list[RemoteAgentConnections] = []
         self.cards: dict[str, AgentCard] = {}
         for address in remote_agent_addresses:
             card_resolver = A2ACardResolver(address)
@@ -146,6 +161,10 @@ class HostAgent:
         self.agents = "\n".join(agent_info)
 
     def register_agent_card(self, card: AgentCard):
+        if card.name in self.remote_agent_connections:
+            self._replaced_connections.append(
+                self.remote_agent_connections[card.name]
+            )
         remote_connection = RemoteAgentConnections(card)
         self.remote_agent_connections[card.name] = remote_connection
         self.cards[card.name] = card
@@ -154,6 +173,15 @@ class HostAgent:
             agent_info.append(json.dumps(ra))
         self.agents = "\n".join(agent_info)
 
+    async def close(self):
+        """Closes the connections to all remote agents."""
+        connections = [
+            *self.remote_agent_connections.values(),
+            *self._replaced_connections,
+        ]
+        self._replaced_connections = []
+        await asyncio.gather(*(connection.close() for connection in connections))
+
     def create_agent(self) -> Agent:
         agent = Agent(
             model="gemini-2.0-flash-001",
@@ -376,9 +404,12 @@ context = InvocationContext(
 # 5. Run your agent with run_async(...)
 # ---------------------------------------------------------
 async def main():
-    async for event in root_agent.run_async(context):
-        if event.content:
-            print("Agent output:", event.content.text())
+    try:
+        async for event in root_agent.run_async(context):
+            if event.content:
+                print("Agent output:", event.content.text())
+    finally:
+        await host_agent.close()
 
 
 asyncio.run(main())
@@ -1,76 +1,183 @@
+import asyncio
 import hashlib
 import json
 import logging
+import os
 import time
 import uuid
+from collections import OrderedDict
 from typing import Any
 
 import httpx
 import jwt
 from jwcrypto import jwk
-from jwt import PyJWK, PyJWKClient
+from jwt import PyJWK
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
 logger = logging.getLogger(__name__)
 AUTH_HEADER_PREFIX = "Bearer "
 
+# JWK parameters of the keys per JWS algorithm. ES256 and EdDSA sign several
+# times faster than RS256 with 2048-bit RSA.
+SIGNING_KEY_PARAMS = {
+    "RS256": {"kty": "RSA", "size": 2048},
+    "ES256": {"kty": "EC", "crv": "P-256"},
+    "EdDSA": {"kty": "OKP", "crv": "Ed25519"},
+}
+
 
 class PushNotificationAuth:
-    def _calculate_request_body_sha256(self, data: dict[str, Any]):
-        """Calculates the SHA256 hash of a request body.
+    def _serialize_request_body(self, data: dict[str, Any]) -> bytes:
+        """Serializes a request body to its canonical JSON bytes.
 
         This logic needs to be same for both the agent who signs the payload and the client verifier.
         """
-        body_str = json.dumps(
+        return json.dumps(
             data,
             ensure_ascii=False,
             allow_nan=False,
             indent=None,
             separators=(",", ":"),
-        )
-        return hashlib.sha256(body_str.encode()).hexdigest()
+        ).encode()
+
+    def _calculate_request_body_sha256(self, data: dict[str, Any]):
+        """Calculates the SHA256 hash of a request body."""
+        return hashlib.sha256(self._serialize_request_body(data)).hexdigest()
 
 
 class PushNotificationSenderAuth(PushNotificationAuth):
-    def __init__(self):
+    """Signs and sends push notifications over one pooled HTTP client.
+
+    The client keeps connections to the webhooks alive between notifications, so
+    state transitions do not pay TCP and TLS setup each time. ``http2=True``
+    requires the optional ``h2`` package (``pip install httpx[http2]``).
+
+    URL verification results are cached: successful ones for
+    ``verification_ttl`` seconds, failed ones for ``verification_failure_ttl``
+    seconds. Concurrent verifications of the same URL share one challenge.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        limits: httpx.Limits | None = None,
+        http2: bool = False,
+        verification_ttl: float = 300.0,
+        verification_failure_ttl: float = 30.0,
+        max_verified_urls: int = 1024,
+    ):
         self.public_keys = []
         self.private_key_jwk: PyJWK = None
+        self.signing_algorithm = "RS256"
+        self.timeout = timeout
+        self.limits = (
+            limits
+            if limits is not None
+            else httpx.Limits(
+                max_connections=100, max_keepalive_connections=20, keepalive_expiry=30
+            )
+        )
+        self.http2 = http2
+        self._client: httpx.AsyncClient | None = None
+        self._client_pid: int | None = None
+        self.verification_ttl = verification_ttl
+        self.verification_failure_ttl = verification_failure_ttl
+        self.max_verified_urls = max_verified_urls
+        # URL -> (result, expiry time), in insertion order.
+        self._verified_urls: OrderedDict[str, tuple[bool, float]] = OrderedDict()
+        self._verifications: dict[str, asyncio.Task] = {}
+        self.verification_counts = {"challenges": 0, "cache_hits": 0, "coalesced": 0}
 
-    @staticmethod
-    async def verify_push_notification_url(url: str) -> bool:
-        async with httpx.AsyncClient(timeout=10) as client:
-            try:
-                validation_token = str(uuid.uuid4())
-                response = await client.get(
-                    url, params={"validationToken": validation_token}
-                )
-                response.raise_for_status()
-                is_verified = response.text == validation_token
-
-                logger.info(f"Verified push-notification URL: {url} => {is_verified}")
+    def _get_client(self) -> httpx.AsyncClient:
+        # Lazy and per process: connections must not be shared across a fork
+        # (see A2AServer with several workers).
+        if self._client is None or self._client_pid != os.getpid():
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout, limits=self.limits, http2=self.http2
+            )
+            self._client_pid = os.getpid()
+        return self._client
+
+    async def close(self):
+        if self._client is not None and self._client_pid == os.getpid():
+            await self._client.aclose()
+        self._client = None
+
+    async def verify_push_notification_url(self, url: str) -> bool:
+        cached = self._verified_urls.get(url)
+        if cached is not None:
+            is_verified, expires_at = cached
+            if time.monotonic() < expires_at:
+                self.verification_counts["cache_hits"] += 1
                 return is_verified
-            except Exception as e:
-                logger.warning(
-                    f"Error during sending push-notification for URL {url}: {e}"
-                )
+            del self._verified_urls[url]
+
+        verification = self._verifications.get(url)
+        if verification is None:
+            verification = asyncio.create_task(self._verify_and_cache(url))
+            self._verifications[url] = verification
+            verification.add_done_callback(
+                lambda _: self._verifications.pop(url, None)
+            )
+        else:
+            self.verification_counts["coalesced"] += 1
+        return await asyncio.shield(verification)
+
+    async def _verify_and_cache(self, url: str) -> bool:
+        self.verification_counts["challenges"] += 1
+        is_verified = await self._send_verification_challenge(url)
+        ttl = self.verification_ttl if is_verified else self.verification_failure_ttl
+        self._verified_urls[url] = (is_verified, time.monotonic() + ttl)
+        self._verified_urls.move_to_end(url)
+        while len(self._verified_urls) > self.max_verified_urls:
+            self._verified_urls.popitem(last=False)
+        return is_verified
+
+    async def _send_verification_challenge(self, url: str) -> bool:
+        try:
+            validation_token = str(uuid.uuid4())
+            response = await self._get_client().get(
+                url, params={"validationToken": validation_token}
+            )
+            response.raise_for_status()
+            is_verified = response.text == validation_token
+
+            logger.info(f"Verified push-notification URL: {url} => {is_verified}")
+            return is_verified
+        except Exception as e:
+            logger.warning(f"Error during sending push-notification for URL {url}: {e}")
 
         return False
 
-    def generate_jwk(self):
-        key = jwk.JWK.generate(kty="RSA", size=2048, kid=str(uuid.uuid4()), use="sig")
+    def generate_jwk(self, algorithm: str = "RS256"):
+        """Generates a new signing key for ``algorithm`` (RS256, ES256 or EdDSA).
+
+        Earlier public keys stay in the JWKS, so notifications signed with them
+        can still be verified.
+        """
+        if algorithm not in SIGNING_KEY_PARAMS:
+            raise ValueError(f"Unsupported signing algorithm: {algorithm}")
+
+        key = jwk.JWK.generate(
+            **SIGNING_KEY_PARAMS[algorithm],
+            kid=str(uuid.uuid4()),
+            use="sig",
+            alg=algorithm,
+        )
         self.public_keys.append(key.export_public(as_dict=True))
         self.private_key_jwk = PyJWK.from_json(key.export_private())
+        self.signing_algorithm = algorithm
 
     def handle_jwks_endpoint(self, _request: Request):
         """Allow clients to fetch public keys."""
         return JSONResponse({"keys": self.public_keys})
 
-    def _generate_jwt(self, data: dict[str, Any]):
+    def _generate_jwt(self, body: bytes):
         """JWT is generated by signing both the request payload SHA digest and time of token generation.
 
         Payload is signed with private key and it ensures the integrity of payload for client.
-        Including iat prevents from replay attack.
+        Including iat and a unique jti lets the receiver reject replayed tokens.
         """
 
         iat = int(time.time())
@@ -78,34 +185,183 @@ class PushNotificationSenderAuth(PushNotificationAuth):
         return jwt.encode(
             {
                 "iat": iat,
-                "request_body_sha256": self._calculate_request_body_sha256(data),
+                "jti": uuid.uuid4().hex,
+                "request_body_sha256": hashlib.sha256(body).hexdigest(),
             },
-            key=self.private_key_jwk,
+            key=self.private_key_jwk.key,
             headers={"kid": self.private_key_jwk.key_id},
-            algorithm="RS256",
+            algorithm=self.signing_algorithm,
         )
 
-    async def send_push_notification(self, url: str, data: dict[str, Any]):
-        jwt_token = self._generate_jwt(data)
-        headers = {"Authorization": f"Bearer {jwt_token}"}
-        async with httpx.AsyncClient(timeout=10) as client:
-            try:
-                response = await client.post(url, json=data, headers=headers)
-                response.raise_for_status()
-                logger.info(f"Push-notification sent for URL: {url}")
-            except Exception as e:
-                logger.warning(
-                    f"Error during sending push-notification for URL {url}: {e}"
-                )
+    async def send_push_notification(self, url: str, data: dict[str, Any]) -> bool:
+        """Sends one signed push notification and returns whether it was accepted."""
+        # Serialize once: exactly these bytes are hashed and sent.
+        body = self._serialize_request_body(data)
+        jwt_token = self._generate_jwt(body)
+        headers = {
+            "Authorization": f"Bearer {jwt_token}",
+            "Content-Type": "application/json",
+        }
+        try:
+            response = await self._get_client().post(
+                url, content=body, headers=headers
+            )
+            response.raise_for_status()
+            logger.info(f"Push-notification sent for URL: {url}")
+            return True
+        except Exception as e:
+            logger.warning(f"Error during sending push-notification for URL {url}: {e}")
+            return False
+
+
+class ReplayNonceStore:
+    """Remembers token nonces for a fixed time window to reject replays.
+
+    Entries expire in insertion order, since every entry lives for the same
+    window. At most ``max_entries`` nonces are kept; beyond that the oldest are
+    dropped, so memory stays bounded even under a flood of notifications.
+    """
+
+    def __init__(self, window: float = 300.0, max_entries: int = 100_000):
+        self.window = window
+        self.max_entries = max_entries
+        self._expires_at: OrderedDict[str, float] = OrderedDict()
+
+    def add(self, nonce: str) -> bool:
+        """Stores ``nonce`` and returns False if it was already seen."""
+        now = time.monotonic()
+        while self._expires_at:
+            oldest_nonce, expires_at = next(iter(self._expires_at.items()))
+            if expires_at > now:
+                break
+            del self._expires_at[oldest_nonce]
+
+        if nonce in self._expires_at:
+            return False
+
+        self._expires_at[nonce] = now + self.window
+        if len(self._expires_at) > self.max_entries:
+            self._expires_at.popitem(last=False)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._expires_at)
 
 
 class PushNotificationReceiverAuth(PushNotificationAuth):
-    def __init__(self):
+    """Verifies signed push notifications without blocking the event loop.
+
+    The sender's JWKS is fetched asynchronously, cached by ``kid`` and refreshed
+    in the background every ``jwks_refresh_interval`` seconds. A token with an
+    unknown ``kid`` triggers one immediate refresh (at most every
+    ``min_jwks_refresh_interval`` seconds), so key rotation is picked up. If the
+    JWKS endpoint is down at startup, the same refreshes load the keys later.
+
+    Each token is only accepted with the algorithm of the key it names.
+    """
+
+    def __init__(
+        self,
+        jwks_refresh_interval: float = 300.0,
+        min_jwks_refresh_interval: float = 10.0,
+        max_token_age: float = 60 * 5,
+        max_replay_entries: int = 100_000,
+    ):
         self.public_keys_jwks = []
-        self.jwks_client = None
+        self.jwks_url: str | None = None
+        self.jwks_refresh_interval = jwks_refresh_interval
+        self.min_jwks_refresh_interval = min_jwks_refresh_interval
+        self.max_token_age = max_token_age
+        # kid -> (key, the only algorithm accepted for it)
+        self.signing_keys: dict[str, tuple[PyJWK, str]] = {}
+        # Tokens older than max_token_age are rejected anyway, so the same
+        # window is enough for replay detection.
+        self.replay_nonces = ReplayNonceStore(max_token_age, max_replay_entries)
+        self._client: httpx.AsyncClient | None = None
+        self._refresh_task: asyncio.Task | None = None
+        self._jwks_refresh: asyncio.Task | None = None
+        self._last_jwks_refresh = 0.0
 
     async def load_jwks(self, jwks_url: str):
-        self.jwks_client = PyJWKClient(jwks_url)
+        self.jwks_url = jwks_url
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_jwks_periodically())
+        try:
+            await self._refresh_jwks()
+        except Exception as e:
+            # Not fatal: the periodic refresh and the refresh on an unknown kid
+            # load the keys later.
+            logger.warning(f"Error while loading JWKS from {self.jwks_url}: {e}")
+
+    async def close(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _refresh_jwks_periodically(self):
+        while True:
+            await asyncio.sleep(self.jwks_refresh_interval)
+            try:
+                await self._refresh_jwks()
+            except Exception as e:
+                logger.warning(f"Error while refreshing JWKS from {self.jwks_url}: {e}")
+
+    async def _refresh_jwks(self):
+        # Concurrent refreshes (e.g. several unknown kids) share one request.
+        if self._jwks_refresh is None or self._jwks_refresh.done():
+            self._jwks_refresh = asyncio.create_task(self._fetch_jwks())
+        await asyncio.shield(self._jwks_refresh)
+
+    async def _fetch_jwks(self):
+        self._last_jwks_refresh = time.monotonic()
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=10)
+        response = await self._client.get(self.jwks_url)
+        response.raise_for_status()
+        self.public_keys_jwks = response.json().get("keys", [])
+
+        signing_keys = {}
+        for key in self.public_keys_jwks:
+            try:
+                algorithm = self._get_key_algorithm(key)
+                signing_keys[key["kid"]] = (PyJWK(key, algorithm), algorithm)
+            except Exception as e:
+                logger.warning(f"Ignoring unusable JWK {key.get('kid')}: {e}")
+        self.signing_keys = signing_keys
+
+    @staticmethod
+    def _get_key_algorithm(key: dict[str, Any]) -> str:
+        algorithm = key.get("alg")
+        if algorithm is None:
+            # Without "alg", kty and crv determine the algorithm.
+            algorithm = next(
+                (
+                    name
+                    for name, params in SIGNING_KEY_PARAMS.items()
+                    if params["kty"] == key.get("kty")
+                    and params.get("crv") == key.get("crv")
+                ),
+                None,
+            )
+        if algorithm not in SIGNING_KEY_PARAMS:
+            raise ValueError(f"Unsupported signing algorithm: {algorithm}")
+        return algorithm
+
+    async def _get_signing_key(self, kid: str | None) -> tuple[PyJWK, str]:
+        signing_key = self.signing_keys.get(kid)
+        if signing_key is None and (
+            time.monotonic() - self._last_jwks_refresh
+            >= self.min_jwks_refresh_interval
+        ):
+            await self._refresh_jwks()
+            signing_key = self.signing_keys.get(kid)
+        if signing_key is None:
+            raise ValueError(f"Unknown signing key: {kid}")
+        return signing_key
 
     async def verify_push_notification(self, request: Request) -> bool:
         auth_header = request.headers.get("Authorization")
@@ -114,23 +370,32 @@ class PushNotificationReceiverAuth(PushNotificationAuth):
             return False
 
         token = auth_header[len(AUTH_HEADER_PREFIX) :]
-        signing_key = self.jwks_client.get_signing_key_from_jwt(token)
+        signing_key, algorithm = await self._get_signing_key(
+            jwt.get_unverified_header(token).get("kid")
+        )
 
         decode_token = jwt.decode(
             token,
-            signing_key,
+            signing_key.key,
             options={"require": ["iat", "request_body_sha256"]},
-            algorithms=["RS256"],
+            algorithms=[algorithm],
         )
 
-        actual_body_sha256 = self._calculate_request_body_sha256(await request.json())
+        # Digest over the received bytes, without parsing the body first.
+        actual_body_sha256 = hashlib.sha256(await request.body()).hexdigest()
         if actual_body_sha256 != decode_token["request_body_sha256"]:
             # Payload signature does not match the digest in signed token.
             raise ValueError("Invalid request body")
 
-        if time.time() - decode_token["iat"] > 60 * 5:
+        if time.time() - decode_token["iat"] > self.max_token_age:
             # Do not allow push-notifications older than 5 minutes.
             # This is to prevent replay attack.
             raise ValueError("Token is expired")
 
+        # Older senders without jti: the signature identifies the token
+        # uniquely.
+        nonce = decode_token.get("jti") or token.rsplit(".", 1)[-1]
+        if not self.replay_nonces.add(nonce):
+            raise ValueError("Token was already used")
+
         return True
@@ -0,0 +1,322 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any
+
+from pydantic import BaseModel
+
+from push_notification_auth import PushNotificationSenderAuth
+from utils import redact_identifier, redact_url
+
+logger = logging.getLogger(__name__)
+
+
+class PushDeliveryPolicy(BaseModel):
+    """Delivery settings for the outbound push notification queue.
+
+    A failed delivery is retried up to ``max_attempts`` times in total, after an
+    exponential backoff with full jitter (a random delay between 0 and
+    ``min(max_backoff, initial_backoff * 2 ** (attempt - 1))``). Deliveries that
+    still fail, or do not fit into the queue, are counted as dead letters.
+
+    ``per_url_concurrency`` should stay below ``workers``, so that webhooks
+    other than the slowest one always find a free worker.
+    """
+
+    workers: int = 4
+    max_queue_size: int = 10000
+    max_attempts: int = 5
+    initial_backoff: float = 0.5
+    max_backoff: float = 30.0
+    per_url_concurrency: int = 2
+    # Number of recently dropped deliveries kept for /metrics.
+    dead_letter_history: int = 100
+
+
+class PushDelivery:
+    def __init__(self, url: str, data: dict[str, Any], key: str | None = None):
+        self.url = url
+        self.data = data
+        self.key = key
+        self.attempts = 0
+
+
+class CoalescingWindow:
+    def __init__(self, handle: asyncio.TimerHandle):
+        self.handle = handle
+        self.pending: tuple[str, dict[str, Any], str] | None = None
+
+
+class PushNotificationQueue:
+    """Delivers push notifications from background workers.
+
+    ``enqueue`` never waits on a webhook, so a slow or dead endpoint does not
+    delay task processing. Deliveries wait in one queue per URL, and workers
+    only take work from URLs with fewer than ``per_url_concurrency`` requests in
+    flight. A worker therefore never waits on a saturated URL, and one slow
+    webhook cannot hold up deliveries to the others.
+
+    Deliveries enqueued with the same ``key`` (the task id) are sent one after
+    the other in enqueue order; the next one is only handed to a worker once the
+    previous one was delivered or dropped, including its retries.
+    """
+
+    def __init__(
+        self,
+        sender: PushNotificationSenderAuth,
+        policy: PushDeliveryPolicy | None = None,
+    ):
+        self.sender = sender
+        self.policy = policy if policy is not None else PushDeliveryPolicy()
+        self.counts = {
+            "delivered": 0,
+            "retried": 0,
+            "dead_lettered": 0,
+            "coalesced": 0,
+        }
+        self.dead_letters: deque[dict[str, Any]] = deque(
+            maxlen=self.policy.dead_letter_history
+        )
+        # Waiting deliveries per URL. _ready holds one entry per released slot
+        # of a URL, which exactly one worker picks up.
+        self._url_queues: dict[str, deque[PushDelivery]] = {}
+        self._url_in_flight: dict[str, int] = {}
+        self._url_ready: dict[str, int] = {}
+        self._ready: asyncio.Queue[str] | None = None
+        self._queued = 0
+        # Per key, the deliveries waiting behind the one in progress.
+        self._ordered: dict[str, deque[PushDelivery]] = {}
+        self._held = 0
+        # Queued, in-flight and retry-pending deliveries.
+        self._unfinished = 0
+        self._idle: asyncio.Event | None = None
+        self._workers: list[asyncio.Task] = []
+        self._retry_handles: set[asyncio.TimerHandle] = set()
+        self._in_flight = 0
+        self._coalescing: dict[str, CoalescingWindow] = {}
+
+    def enqueue(self, url: str, data: dict[str, Any], key: str | None = None):
+        self._start()
+        delivery = PushDelivery(url, data, key)
+        if key is not None and key in self._ordered:
+            # An earlier delivery of the same task is not done yet.
+            if self._queued + self._held >= self.policy.max_queue_size:
+                self._dead_letter(delivery, "queue full")
+                return
+            self._ordered[key].append(delivery)
+            self._held += 1
+        elif self._put(delivery):
+            if key is not None:
+                self._ordered[key] = deque()
+        else:
+            return
+        self._unfinished += 1
+        self._idle.clear()
+
+    def enqueue_coalesced(
+        self, key: str, url: str, data: dict[str, Any], window: float
+    ):
+        """Enqueues a notification that later ones for ``key`` may replace.
+
+        The first notification is sent at once. Further ones within ``window``
+        seconds replace each other, and only the latest is sent when the window
+        ends (which opens the next window).
+        """
+        coalescing = self._coalescing.get(key)
+        if coalescing is None:
+            self.enqueue(url, data, key)
+            self._open_window(key, window)
+            return
+
+        if coalescing.pending is not None:
+            self.counts["coalesced"] += 1
+        coalescing.pending = (url, data, key)
+
+    def discard_coalesced(self, key: str):
+        """Drops a pending coalesced notification superseded by a newer update."""
+        coalescing = self._coalescing.pop(key, None)
+        if coalescing is None:
+            return
+        coalescing.handle.cancel()
+        if coalescing.pending is not None:
+            self.counts["coalesced"] += 1
+
+    def _open_window(self, key: str, window: float):
+        handle = asyncio.get_running_loop().call_later(
+            window, self._close_window, key, window
+        )
+        self._coalescing[key] = CoalescingWindow(handle)
+
+    def _close_window(self, key: str, window: float):
+        coalescing = self._coalescing.pop(key)
+        if coalescing.pending is not None:
+            self.enqueue(*coalescing.pending)
+            self._open_window(key, window)
+
+    def _start(self):
+        if self._ready is None:
+            self._ready = asyncio.Queue()
+            self._idle = asyncio.Event()
+            self._idle.set()
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._run_worker())
+                for _ in range(self.policy.workers)
+            ]
+
+    def _put(self, delivery: PushDelivery) -> bool:
+        if self._queued + self._held >= self.policy.max_queue_size:
+            self._dead_letter(delivery, "queue full")
+            return False
+        url_queue = self._url_queues.get(delivery.url)
+        if url_queue is None:
+            url_queue = self._url_queues[delivery.url] = deque()
+        url_queue.append(delivery)
+        self._queued += 1
+        self._release_slots(delivery.url)
+        return True
+
+    def _release_slots(self, url: str):
+        # Releases as many slots as the URL has waiting deliveries and free
+        # places below per_url_concurrency.
+        waiting = len(self._url_queues.get(url, ()))
+        ready = self._url_ready.get(url, 0)
+        busy = self._url_in_flight.get(url, 0) + ready
+        while ready < waiting and busy < self.policy.per_url_concurrency:
+            ready += 1
+            busy += 1
+            self._ready.put_nowait(url)
+        if ready:
+            self._url_ready[url] = ready
+
+    async def _run_worker(self):
+        while True:
+            url = await self._ready.get()
+            self._url_ready[url] -= 1
+            if not self._url_ready[url]:
+                del self._url_ready[url]
+            url_queue = self._url_queues[url]
+            delivery = url_queue.popleft()
+            if not url_queue:
+                del self._url_queues[url]
+            self._queued -= 1
+            self._url_in_flight[url] = self._url_in_flight.get(url, 0) + 1
+            try:
+                await self._deliver(delivery)
+            except Exception as e:
+                logger.error(f"Error while delivering push-notification: {e}")
+                self._finish(delivery)
+            finally:
+                self._url_in_flight[url] -= 1
+                if not self._url_in_flight[url]:
+                    del self._url_in_flight[url]
+                self._release_slots(url)
+
+    async def _deliver(self, delivery: PushDelivery):
+        delivery.attempts += 1
+        self._in_flight += 1
+        try:
+            delivered = await self.sender.send_push_notification(
+                delivery.url, delivery.data
+            )
+        finally:
+            self._in_flight -= 1
+
+        if delivered:
+            self.counts["delivered"] += 1
+            self._finish(delivery)
+        elif delivery.attempts >= self.policy.max_attempts:
+            self._dead_letter(delivery, f"failed after {delivery.attempts} attempts")
+            self._finish(delivery)
+        else:
+            self.counts["retried"] += 1
+            self._schedule_retry(delivery)
+
+    def _finish(self, delivery: PushDelivery):
+        self._unfinished -= 1
+        if delivery.key is not None:
+            # Release the next delivery of the same task.
+            held = self._ordered[delivery.key]
+            while held:
+                next_delivery = held.popleft()
+                self._held -= 1
+                if self._put(next_delivery):
+                    break
+                self._unfinished -= 1
+            else:
+                del self._ordered[delivery.key]
+        if not self._unfinished:
+            self._idle.set()
+
+    def _schedule_retry(self, delivery: PushDelivery):
+        backoff = min(
+            self.policy.max_backoff,
+            self.policy.initial_backoff * 2 ** (delivery.attempts - 1),
+        )
+
+        def retry():
+            self._retry_handles.discard(handle)
+            if not self._put(delivery):
+                self._finish(delivery)
+
+        handle = asyncio.get_running_loop().call_later(
+            random.uniform(0, backoff), retry
+        )
+        self._retry_handles.add(handle)
+
+    def _dead_letter(self, delivery: PushDelivery, reason: str):
+        self.counts["dead_lettered"] += 1
+        # Published on /metrics: no webhook path or query, no raw task id.
+        self.dead_letters.append(
+            {
+                "url": redact_url(delivery.url),
+                "task_id": redact_identifier(delivery.data.get("id")),
+                "attempts": delivery.attempts,
+                "reason": reason,
+                "time": time.time(),
+            }
+        )
+        logger.warning(
+            f"Dropped push-notification for URL {delivery.url} "
+            f"(task {delivery.data.get('id')}): {reason}"
+        )
+
+    async def close(self, timeout: float = 5.0):
+        """Waits up to ``timeout`` seconds for queued deliveries, then stops."""
+        for coalescing in self._coalescing.values():
+            coalescing.handle.cancel()
+            if coalescing.pending is not None:
+                self.enqueue(*coalescing.pending)
+        self._coalescing.clear()
+        if self._idle is not None and self._workers:
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"Stopping with {self._unfinished} undelivered "
+                    "push-notifications"
+                )
+        for handle in self._retry_handles:
+            handle.cancel()
+        self._retry_handles.clear()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def get_metrics(self) -> dict[str, Any]:
+        return {
+            **self.counts,
+            "queued": self._queued + self._held,
+            "in_flight": self._in_flight,
+            "saturated_urls": sum(
+                1
+                for in_flight in self._url_in_flight.values()
+                if in_flight >= self.policy.per_url_concurrency
+            ),
+            "pending_retries": len(self._retry_handles),
+            "coalescing_windows": len(self._coalescing),
+            "recent_dead_letters": list(self.dead_letters),
+        }
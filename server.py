@@ -1,13 +1,19 @@
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Any, AsyncIterable, Union
+import multiprocessing
+import signal
+import socket
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterable, Awaitable, Callable, Union
 
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
-from pydantic import ValidationError
+from fastapi.responses import Response
+from pydantic import BaseModel, ValidationError
 from sse_starlette.sse import EventSourceResponse
 
-from abc_task_manager import TaskManager
+from abc_task_manager import InMemoryTaskManager, TaskManager
 from custom_types import (
     A2ARequest,
     AgentCard,
@@ -17,6 +23,7 @@ from custom_types import (
     InternalError,
     InvalidRequestError,
     JSONParseError,
+    JSONRPCRequest,
     JSONRPCResponse,
     SendTaskRequest,
     SendTaskStreamingRequest,
@@ -26,6 +33,28 @@ from custom_types import (
 
 logger = logging.getLogger(__name__)
 
+# Routing-Tabelle: JSON-RPC Methode -> (konkretes Request-Modell, Name des
+# TaskManager-Handlers); A2AServer bindet die Handler beim Setzen des TaskManagers.
+# So wird jeder Request nur gegen sein eigenes Modell validiert, statt gegen die
+# gesamte A2ARequest-Union mit anschließender isinstance-Kette.
+REQUEST_ROUTES: dict[str, tuple[type[JSONRPCRequest], str]] = {
+    "tasks/get": (GetTaskRequest, "on_get_task"),
+    "tasks/send": (SendTaskRequest, "on_send_task"),
+    "tasks/sendSubscribe": (SendTaskStreamingRequest, "on_send_task_subscribe"),
+    "tasks/cancel": (CancelTaskRequest, "on_cancel_task"),
+    "tasks/pushNotification/set": (
+        SetTaskPushNotificationRequest,
+        "on_set_task_push_notification",
+    ),
+    "tasks/pushNotification/get": (
+        GetTaskPushNotificationRequest,
+        "on_get_task_push_notification",
+    ),
+    "tasks/resubscribe": (TaskResubscriptionRequest, "on_resubscribe_to_task"),
+}
+
+STREAMING_METHODS = {"tasks/sendSubscribe", "tasks/resubscribe"}
+
 
 class A2AServer:
     def __init__(
@@ -35,16 +64,27 @@ class A2AServer:
         endpoint: str = "/",
         agent_card: AgentCard = None,
         task_manager: TaskManager = None,
+        agent_card_max_age: int = 300,
+        workers: int = 1,
+        max_batch_size: int = 100,
+        max_batch_concurrency: int = 10,
     ):
         self.host = host
         self.port = port
         self.endpoint = endpoint
+        self.workers = workers
+        self.max_batch_size = max_batch_size
+        self.max_batch_concurrency = max_batch_concurrency
         self.task_manager = task_manager
+        self.agent_card_max_age = agent_card_max_age
         self.agent_card = agent_card
 
         # Erstelle eine FastAPI-App für automatische Dokumentation (/docs, /redoc, etc.)
         self.app = FastAPI(
-            title="A2A Server", description="A2A Protocol JSON-RPC API", version="1.0.0"
+            title="A2A Server",
+            description="A2A Protocol JSON-RPC API",
+            version="1.0.0",
+            lifespan=self._lifespan,
         )
         # JSON-RPC-Endpunkt (POST) - automatische Response Modell Generierung deaktiviert
         self.app.add_api_route(
@@ -57,6 +97,55 @@ class A2AServer:
             methods=["GET"],
             response_model=None,
         )
+        # Kennzahlen des TaskManagers (Store-Größe, Evictions, ...)
+        self.app.add_api_route(
+            "/metrics", self._get_metrics, methods=["GET"], response_model=None
+        )
+
+    @asynccontextmanager
+    async def _lifespan(self, app: FastAPI):
+        await self.task_manager.start()
+        try:
+            yield
+        finally:
+            await self.task_manager.close()
+
+    @property
+    def task_manager(self) -> TaskManager:
+        return self._task_manager
+
+    @task_manager.setter
+    def task_manager(self, task_manager: TaskManager):
+        # Die Handler werden einmalig gebunden, statt pro Request per getattr
+        # nachgeschlagen zu werden.
+        self._task_manager = task_manager
+        self._routes: dict[
+            str, tuple[type[JSONRPCRequest], Callable[[Any], Awaitable[Any]]]
+        ] = {}
+        if task_manager is not None:
+            self._routes = {
+                method: (request_model, getattr(task_manager, handler_name))
+                for method, (request_model, handler_name) in REQUEST_ROUTES.items()
+            }
+
+    @property
+    def agent_card(self) -> AgentCard:
+        return self._agent_card
+
+    @agent_card.setter
+    def agent_card(self, agent_card: AgentCard):
+        # Die AgentCard wird einmalig serialisiert; der Cache wird nur beim
+        # Ersetzen der Card neu aufgebaut (In-Place-Änderungen werden nicht erkannt).
+        self._agent_card = agent_card
+        self._agent_card_bytes = None
+        self._agent_card_etag = None
+        if agent_card is not None:
+            self._agent_card_bytes = agent_card.model_dump_json(
+                exclude_none=True
+            ).encode()
+            self._agent_card_etag = (
+                f'"{hashlib.sha256(self._agent_card_bytes).hexdigest()}"'
+            )
 
     def start(self):
         if self.agent_card is None:
@@ -65,51 +154,216 @@ class A2AServer:
             raise ValueError("task_manager is not defined")
         import uvicorn
 
+        if self.workers > 1:
+            self._start_workers()
+            return
+
         uvicorn.run(self.app, host=self.host, port=self.port)
 
-    async def _get_agent_card(self, request: Request) -> JSONResponse:
-        # Liefert die AgentCard als JSON zurück.
-        return JSONResponse(self.agent_card.model_dump(exclude_none=True))
+    def _start_workers(self):
+        # Alle Worker teilen sich einen Socket (ein Port) und müssen ihren Task-State
+        # über einen gemeinsamen Task-Store austauschen.
+        if (
+            isinstance(self.task_manager, InMemoryTaskManager)
+            and not self.task_manager.task_store.is_shared
+        ):
+            raise ValueError("Multiple workers require a shared task store")
+        # Ohne fork (z.B. unter Windows) müssten App und TaskManager für "spawn"
+        # serialisierbar sein; das sind sie nicht.
+        if "fork" not in multiprocessing.get_all_start_methods():
+            raise RuntimeError(
+                "Multiple workers need the 'fork' start method, which is not "
+                "available on this platform (e.g. Windows). Run with one worker."
+            )
+        import uvicorn
+
+        config = uvicorn.Config(self.app, host=self.host, port=self.port)
+        sock = config.bind_socket()
+        # "fork" statt "spawn", damit App, TaskManager und Schlüssel nicht
+        # serialisiert werden müssen.
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(target=self._run_worker, args=(config, sock))
+            for _ in range(self.workers)
+        ]
+        logger.info(f"Starting {self.workers} workers on {self.host}:{self.port}")
+        # Nur der Task-State ist geteilt, das Gedächtnis der Agents (LangGraph
+        # MemorySaver, Autogen-State) hat jeder Worker für sich.
+        logger.warning(
+            "Agent conversation memory is per worker: a follow-up message of a "
+            "session that reaches another worker starts without the earlier turns"
+        )
+        for process in processes:
+            process.start()
+        # SIGTERM an den Hauptprozess beendet auch die Worker.
+        signal.signal(signal.SIGTERM, self._raise_keyboard_interrupt)
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
+        finally:
+            sock.close()
+
+    @staticmethod
+    def _raise_keyboard_interrupt(signum, frame):
+        raise KeyboardInterrupt
+
+    @staticmethod
+    def _run_worker(config, sock: socket.socket):
+        import uvicorn
+
+        uvicorn.Server(config).run(sockets=[sock])
+
+    async def _get_agent_card(self, request: Request) -> Response:
+        # Liefert die vorab serialisierte AgentCard als JSON zurück (bzw. 304, wenn
+        # der Client die aktuelle Version bereits kennt).
+        headers = {
+            "ETag": self._agent_card_etag,
+            "Cache-Control": f"public, max-age={self.agent_card_max_age}",
+        }
+        if self._is_agent_card_not_modified(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+
+        return Response(
+            content=self._agent_card_bytes,
+            media_type="application/json",
+            headers=headers,
+        )
+
+    async def _get_metrics(self, request: Request) -> Response:
+        return Response(
+            content=json.dumps(self.task_manager.get_metrics()).encode(),
+            media_type="application/json",
+        )
+
+    def _is_agent_card_not_modified(self, if_none_match: str | None) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match verwendet den schwachen Vergleich, "W/" wird ignoriert.
+        etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return self._agent_card_etag in etags
 
     async def _process_request(
         self, request: Request
-    ) -> Union[JSONResponse, EventSourceResponse]:
+    ) -> Union[Response, EventSourceResponse]:
         try:
             body = await request.json()
-            json_rpc_request = A2ARequest.validate_python(body)
-
-            if isinstance(json_rpc_request, GetTaskRequest):
-                result = await self.task_manager.on_get_task(json_rpc_request)
-            elif isinstance(json_rpc_request, SendTaskRequest):
-                result = await self.task_manager.on_send_task(json_rpc_request)
-            elif isinstance(json_rpc_request, SendTaskStreamingRequest):
-                result = await self.task_manager.on_send_task_subscribe(
-                    json_rpc_request
-                )
-            elif isinstance(json_rpc_request, CancelTaskRequest):
-                result = await self.task_manager.on_cancel_task(json_rpc_request)
-            elif isinstance(json_rpc_request, SetTaskPushNotificationRequest):
-                result = await self.task_manager.on_set_task_push_notification(
-                    json_rpc_request
-                )
-            elif isinstance(json_rpc_request, GetTaskPushNotificationRequest):
-                result = await self.task_manager.on_get_task_push_notification(
-                    json_rpc_request
-                )
-            elif isinstance(json_rpc_request, TaskResubscriptionRequest):
-                result = await self.task_manager.on_resubscribe_to_task(
-                    json_rpc_request
-                )
-            else:
-                logger.warning(f"Unexpected request type: {type(json_rpc_request)}")
-                raise ValueError(f"Unexpected request type: {type(json_rpc_request)}")
+            if isinstance(body, list):
+                return await self._process_batch_request(body)
 
+            json_rpc_request, handler = self._parse_request(body)
+            if json_rpc_request.method == "tasks/resubscribe":
+                self._apply_last_event_id(json_rpc_request, request)
+            result = await handler(json_rpc_request)
             return self._create_response(result)
 
         except Exception as e:
             return self._handle_exception(e)
 
-    def _handle_exception(self, e: Exception) -> JSONResponse:
+    @staticmethod
+    def _apply_last_event_id(
+        json_rpc_request: TaskResubscriptionRequest, request: Request
+    ):
+        # Ein per EventSource neu verbundener Client sendet die letzte empfangene
+        # Event-ID als Header; ein explizites lastEventId in params hat Vorrang.
+        last_event_id = request.headers.get("last-event-id", "").strip()
+        if json_rpc_request.params.lastEventId is None and last_event_id.isdecimal():
+            json_rpc_request.params.lastEventId = int(last_event_id)
+
+    def _parse_request(
+        self, body: Any
+    ) -> tuple[JSONRPCRequest, Callable[[Any], Awaitable[Any]]]:
+        method = body.get("method") if isinstance(body, dict) else None
+        route = self._routes.get(method) if isinstance(method, str) else None
+        if route is None:
+            # Unbekannte Methode oder ungültiger Payload: die A2ARequest-Union
+            # liefert dafür den passenden ValidationError.
+            A2ARequest.validate_python(body)
+            raise ValueError(f"Unexpected request payload: {body}")
+
+        request_model, handler = route
+        return request_model.model_validate(body), handler
+
+    async def _process_batch_request(self, batch: list[Any]) -> Response:
+        # JSON-RPC 2.0 Batch: Die Elemente werden nebenläufig abgearbeitet (höchstens
+        # max_batch_concurrency gleichzeitig) und die Antworten als ein Array
+        # zurückgegeben. Notifications (ohne "id") bekommen keine Antwort.
+        if not batch:
+            response = JSONRPCResponse(id=None, error=InvalidRequestError())
+            return self._create_json_response(response, status_code=400)
+        if len(batch) > self.max_batch_size:
+            response = JSONRPCResponse(
+                id=None,
+                error=InvalidRequestError(
+                    message=f"Batch exceeds {self.max_batch_size} requests"
+                ),
+            )
+            return self._create_json_response(response, status_code=400)
+
+        semaphore = asyncio.Semaphore(self.max_batch_concurrency)
+
+        async def process_item(item: Any) -> JSONRPCResponse | None:
+            async with semaphore:
+                return await self._process_batch_item(item)
+
+        responses = [
+            response
+            for response in await asyncio.gather(
+                *(process_item(item) for item in batch)
+            )
+            if response is not None
+        ]
+        if not responses:
+            # Ein Batch nur aus Notifications liefert keinen Body.
+            return Response(status_code=204)
+
+        content = b",".join(
+            response.model_dump_json(exclude_none=True).encode()
+            for response in responses
+        )
+        return Response(content=b"[" + content + b"]", media_type="application/json")
+
+    async def _process_batch_item(self, item: Any) -> JSONRPCResponse | None:
+        request_id = item.get("id") if isinstance(item, dict) else None
+        try:
+            json_rpc_request, handler = self._parse_request(item)
+        except Exception as e:
+            # Ungültige Elemente werden auch ohne "id" beantwortet (mit id null).
+            return self._create_error_response(e, request_id)
+
+        try:
+            if json_rpc_request.method in STREAMING_METHODS:
+                response = JSONRPCResponse(
+                    id=json_rpc_request.id,
+                    error=InvalidRequestError(
+                        message="Streaming methods are not supported in batch requests"
+                    ),
+                )
+            else:
+                response = await handler(json_rpc_request)
+                if not isinstance(response, JSONRPCResponse):
+                    logger.error(f"Unexpected result type: {type(response)}")
+                    raise ValueError(f"Unexpected result type: {type(response)}")
+
+        except Exception as e:
+            response = self._create_error_response(e, request_id)
+
+        # Notifications werden ausgeführt, aber nicht beantwortet.
+        return response if "id" in item else None
+
+    def _handle_exception(self, e: Exception) -> Response:
+        response = self._create_error_response(e)
+        return self._create_json_response(response, status_code=400)
+
+    def _create_error_response(
+        self, e: Exception, request_id: int | str | None = None
+    ) -> JSONRPCResponse:
         if isinstance(e, json.decoder.JSONDecodeError):
             json_rpc_error = JSONParseError()
         elif isinstance(e, ValidationError):
@@ -118,21 +372,34 @@ class A2AServer:
             logger.error(f"Unhandled exception: {e}")
             json_rpc_error = InternalError()
 
-        response = JSONRPCResponse(id=None, error=json_rpc_error)
-        return JSONResponse(response.model_dump(exclude_none=True), status_code=400)
+        return JSONRPCResponse(id=request_id, error=json_rpc_error)
+
+    def _create_json_response(
+        self, model: BaseModel, status_code: int = 200
+    ) -> Response:
+        # Serialisiert das Modell direkt zu JSON-Bytes (ein Durchlauf), statt erst
+        # ein dict zu bauen, das JSONResponse dann nochmal mit json.dumps kodiert.
+        return Response(
+            content=model.model_dump_json(exclude_none=True).encode(),
+            media_type="application/json",
+            status_code=status_code,
+        )
 
-    def _create_response(self, result: Any) -> Union[JSONResponse, EventSourceResponse]:
+    def _create_response(self, result: Any) -> Union[Response, EventSourceResponse]:
         if isinstance(result, AsyncIterable):
 
             async def event_generator(
                 result: AsyncIterable,
             ) -> AsyncIterable[dict[str, str]]:
                 async for item in result:
-                    yield {"data": item.model_dump_json(exclude_none=True)}
+                    event = {"data": item.model_dump_json(exclude_none=True)}
+                    if getattr(item, "event_id", None) is not None:
+                        event["id"] = str(item.event_id)
+                    yield event
 
             return EventSourceResponse(event_generator(result))
         elif isinstance(result, JSONRPCResponse):
-            return JSONResponse(result.model_dump(exclude_none=True))
+            return self._create_json_response(result)
         else:
             logger.error(f"Unexpected result type: {type(result)}")
             raise ValueError(f"Unexpected result type: {type(result)}")
@@ -0,0 +1,144 @@
+import asyncio
+from collections import deque
+from enum import Enum
+from typing import Any
+
+from pydantic import BaseModel
+
+from custom_types import InternalError, JSONRPCError, TaskStatusUpdateEvent
+
+
+class SlowConsumerPolicy(str, Enum):
+    DROP_OLDEST = "drop-oldest"
+    COALESCE = "coalesce"
+    DISCONNECT = "disconnect"
+
+
+class SSEQueuePolicy(BaseModel):
+    """Bounds for the per-subscriber SSE event queues.
+
+    ``max_queue_size <= 0`` keeps the queues unbounded. When a queue is full the
+    slow consumer policy decides what happens:
+
+    - drop-oldest: the oldest queued event is discarded.
+    - coalesce: queued non-final status updates are replaced by the new one, since
+      only the latest status matters. Falls back to drop-oldest if there is
+      nothing to coalesce.
+    - disconnect: the queue is cleared and the subscriber's stream is ended
+      with an error.
+    """
+
+    max_queue_size: int = 1000
+    slow_consumer_policy: SlowConsumerPolicy = SlowConsumerPolicy.COALESCE
+    # Number of events per task kept for tasks/resubscribe.
+    event_log_size: int = 100
+    # Seconds the event log is kept after the final event.
+    event_log_ttl: float = 60.0
+
+
+class TaskEventLog:
+    """Bounded, sequence-numbered log of the SSE events emitted for one task.
+
+    Sequence numbers start at 1 and are used as SSE event ids, so a client that
+    reconnects with Last-Event-ID gets the events it missed replayed.
+    """
+
+    def __init__(self, maxlen: int):
+        self.last_event_id = 0
+        self._events: deque[tuple[int, Any]] = deque(maxlen=maxlen)
+
+    def append(self, event: Any) -> int:
+        self.last_event_id += 1
+        self._events.append((self.last_event_id, event))
+        return self.last_event_id
+
+    def events_after(self, event_id: int) -> list[tuple[int, Any]]:
+        return [(seq, event) for seq, event in self._events if seq > event_id]
+
+    def has_events_after(self, event_id: int) -> bool:
+        """Whether all events after ``event_id`` are still in the log."""
+        oldest_event_id = self._events[0][0] if self._events else self.last_event_id + 1
+        return oldest_event_id - 1 <= event_id <= self.last_event_id
+
+    @property
+    def is_final(self) -> bool:
+        return bool(self._events) and _is_final_event(self._events[-1][1])
+
+
+def _is_final_event(event: Any) -> bool:
+    # An error also ends every subscriber's stream.
+    return isinstance(event, JSONRPCError) or (
+        isinstance(event, TaskStatusUpdateEvent) and event.final
+    )
+
+
+class SSESubscriberQueue:
+    """Event queue of a single SSE subscriber.
+
+    ``put_nowait`` never blocks, so fan-out to many subscribers is not held up by
+    a stalled client; the policy bounds the memory such a client can pin. Items
+    are ``(event_id, event)`` pairs, ``event_id`` being the event's sequence
+    number in the task's event log (or ``None``).
+    """
+
+    def __init__(self, policy: SSEQueuePolicy | None = None):
+        self.policy = policy if policy is not None else SSEQueuePolicy()
+        self.dropped = 0
+        self.disconnected = False
+        self._events: deque[tuple[int | None, Any]] = deque()
+        self._not_empty = asyncio.Event()
+
+    def qsize(self) -> int:
+        return len(self._events)
+
+    def put_nowait(self, event: Any, event_id: int | None = None):
+        if self.disconnected:
+            self.dropped += 1
+            return
+
+        max_queue_size = self.policy.max_queue_size
+        if max_queue_size > 0 and len(self._events) >= max_queue_size:
+            self._handle_overflow(event, event_id)
+        else:
+            self._events.append((event_id, event))
+        self._not_empty.set()
+
+    def _handle_overflow(self, event: Any, event_id: int | None):
+        policy = self.policy.slow_consumer_policy
+        if policy == SlowConsumerPolicy.DISCONNECT:
+            self.dropped += len(self._events) + 1
+            self._events.clear()
+            self._events.append(
+                (
+                    None,
+                    InternalError(
+                        message="Subscriber is too slow and was disconnected"
+                    ),
+                )
+            )
+            self.disconnected = True
+            return
+
+        if policy == SlowConsumerPolicy.COALESCE and self._is_coalescable(event):
+            kept_events = deque(
+                queued
+                for queued in self._events
+                if not self._is_coalescable(queued[1])
+            )
+            self.dropped += len(self._events) - len(kept_events)
+            self._events = kept_events
+
+        if len(self._events) >= self.policy.max_queue_size:
+            self._events.popleft()
+            self.dropped += 1
+        self._events.append((event_id, event))
+
+    @staticmethod
+    def _is_coalescable(event: Any) -> bool:
+        return isinstance(event, TaskStatusUpdateEvent) and not event.final
+
+    async def get(self) -> tuple[int | None, Any]:
+        while not self._events:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        return self._events.popleft()
@@ -1,10 +1,10 @@
 import asyncio
 import logging
 import traceback
-from typing import AsyncIterable, Union
+from typing import Any, AsyncIterable, Union
 
 import utils as utils
-from abc_task_manager import InMemoryTaskManager
+from abc_task_manager import FINAL_TASK_STATES, InMemoryTaskManager
 from a2a_wrapper_database_agent import DatabaseAgent
 from custom_types import (
     Artifact,
@@ -19,7 +19,8 @@ from custom_types import (
     SendTaskStreamingResponse,
     Task,
     TaskArtifactUpdateEvent,
-    TaskIdParams,
+    TaskCanceledError,
+    TaskResubscriptionParams,
     TaskSendParams,
     TaskState,
     TaskStatus,
@@ -27,17 +28,47 @@ from custom_types import (
     TextPart,
 )
 from push_notification_auth import PushNotificationSenderAuth
+from push_notification_queue import PushDeliveryPolicy, PushNotificationQueue
+from sse_queue import SSEQueuePolicy
+from task_scheduler import TaskSchedulerPolicy
+from task_store import TaskRetentionPolicy, TaskStore
 
 logger = logging.getLogger(__name__)
 
 
 class DatabaseAgentTaskManager(InMemoryTaskManager):
     def __init__(
-        self, agent: DatabaseAgent, notification_sender_auth: PushNotificationSenderAuth
+        self,
+        agent: DatabaseAgent,
+        notification_sender_auth: PushNotificationSenderAuth,
+        task_store: TaskStore | None = None,
+        retention_policy: TaskRetentionPolicy | None = None,
+        sse_queue_policy: SSEQueuePolicy | None = None,
+        scheduler_policy: TaskSchedulerPolicy | None = None,
+        push_delivery_policy: PushDeliveryPolicy | None = None,
     ):
-        super().__init__()
+        super().__init__(
+            task_store, retention_policy, sse_queue_policy, scheduler_policy
+        )
         self.agent = agent
         self.notification_sender_auth = notification_sender_auth
+        self.push_notification_queue = PushNotificationQueue(
+            notification_sender_auth, push_delivery_policy
+        )
+
+    async def close(self):
+        await super().close()
+        await self.push_notification_queue.close()
+        await self.notification_sender_auth.close()
+
+    def get_metrics(self) -> dict[str, Any]:
+        return {
+            **super().get_metrics(),
+            "push_notifications": self.push_notification_queue.get_metrics(),
+            "push_url_verifications": dict(
+                self.notification_sender_auth.verification_counts
+            ),
+        }
 
     async def _run_streaming_agent(self, request: SendTaskStreamingRequest):
         task_send_params: TaskSendParams = request.params
@@ -70,7 +101,9 @@ class DatabaseAgentTaskManager(InMemoryTaskManager):
                     task_status,
                     None if artifact is None else [artifact],
                 )
-                await self.send_task_notification(latest_task)
+                await self.send_task_notification(
+                    latest_task, None if artifact is None else [artifact]
+                )
 
                 if artifact:
                     task_artifact_update_event = TaskArtifactUpdateEvent(
@@ -87,8 +120,29 @@ class DatabaseAgentTaskManager(InMemoryTaskManager):
                     task_send_params.id, task_update_event
                 )
 
+        except TaskCanceledError as e:
+            # Canceled in another worker: end the stream with the final status.
+            logger.info(f"Stopped streaming task {task_send_params.id}: {e}")
+            await self.enqueue_events_for_sse(
+                task_send_params.id,
+                TaskStatusUpdateEvent(
+                    id=task_send_params.id, status=e.task.status, final=True
+                ),
+            )
         except Exception as e:
             logger.error(f"An error occurred while streaming the response: {e}")
+            # Store the task as FAILED, so it counts as terminal for retention
+            # and tasks/get does not report it as WORKING forever.
+            try:
+                latest_task = await self.update_store(
+                    task_send_params.id, TaskStatus(state=TaskState.FAILED), None
+                )
+                await self.send_task_notification(latest_task)
+            except Exception as store_error:
+                logger.error(
+                    f"Could not mark task {task_send_params.id} as failed: "
+                    f"{store_error}"
+                )
             await self.enqueue_events_for_sse(
                 task_send_params.id,
                 InternalError(
@@ -124,6 +178,9 @@ class DatabaseAgentTaskManager(InMemoryTaskManager):
 
     async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
         """Handles the 'send task' request."""
+        return await self.send_task_single_flight(request, self._send_task)
+
+    async def _send_task(self, request: SendTaskRequest) -> SendTaskResponse:
         validation_error = self._validate_request(request)
         if validation_error:
             return SendTaskResponse(id=request.id, error=validation_error.error)
@@ -140,20 +197,46 @@ class DatabaseAgentTaskManager(InMemoryTaskManager):
                 )
 
         await self.upsert_task(request.params)
-        task = await self.update_store(
-            request.params.id, TaskStatus(state=TaskState.WORKING), None
-        )
-        await self.send_task_notification(task)
 
         task_send_params: TaskSendParams = request.params
         query = self._get_user_query(task_send_params)
+        agent_run = self.start_agent_run(
+            task_send_params.id,
+            self._invoke_agent(task_send_params, query),
+            self.get_task_priority(task_send_params),
+            task_send_params.sessionId,
+        )
+        try:
+            await asyncio.wait({agent_run})
+        except asyncio.CancelledError:
+            agent_run.cancel()
+            raise
+        if agent_run.cancelled() or isinstance(
+            agent_run.exception(), TaskCanceledError
+        ):
+            # Stopped by tasks/cancel: on_cancel_task holds the task lock until
+            # the CANCELED state is stored.
+            async with self.task_locks.lock(task_send_params.id):
+                task = await self.task_store.get_task(task_send_params.id)
+            task_result = self.append_task_history(
+                task, task_send_params.historyLength
+            )
+            return SendTaskResponse(id=request.id, result=task_result)
+
         try:
-            agent_response = self.agent.invoke(query, task_send_params.sessionId)
+            agent_response = agent_run.result()
         except Exception as e:
             logger.error(f"Error invoking agent: {e}")
             raise ValueError(f"Error invoking agent: {e}")
         return await self._process_agent_response(request, agent_response)
 
+    async def _invoke_agent(self, task_send_params: TaskSendParams, query: str):
+        task = await self.update_store(
+            task_send_params.id, TaskStatus(state=TaskState.WORKING), None
+        )
+        await self.send_task_notification(task)
+        return await self.agent.invoke(query, task_send_params.sessionId)
+
     async def on_send_task_subscribe(
         self, request: SendTaskStreamingRequest
     ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
@@ -178,7 +261,12 @@ class DatabaseAgentTaskManager(InMemoryTaskManager):
             task_send_params: TaskSendParams = request.params
             sse_event_queue = await self.setup_sse_consumer(task_send_params.id, False)
 
-            asyncio.create_task(self._run_streaming_agent(request))
+            self.start_agent_run(
+                task_send_params.id,
+                self._run_streaming_agent(request),
+                self.get_task_priority(task_send_params),
+                task_send_params.sessionId,
+            )
 
             return self.dequeue_events_for_sse(
                 request.id, task_send_params.id, sse_event_queue
@@ -212,11 +300,19 @@ class DatabaseAgentTaskManager(InMemoryTaskManager):
         else:
             task_status = TaskStatus(state=TaskState.COMPLETED)
             artifact = Artifact(parts=parts)
-        task = await self.update_store(
-            task_id, task_status, None if artifact is None else [artifact]
-        )
+        try:
+            task = await self.update_store(
+                task_id, task_status, None if artifact is None else [artifact]
+            )
+        except TaskCanceledError as e:
+            # Canceled during the agent call: the response is discarded.
+            return SendTaskResponse(
+                id=request.id, result=self.append_task_history(e.task, history_length)
+            )
         task_result = self.append_task_history(task, history_length)
-        await self.send_task_notification(task)
+        await self.send_task_notification(
+            task, None if artifact is None else [artifact]
+        )
         return SendTaskResponse(id=request.id, result=task_result)
 
     def _get_user_query(self, task_send_params: TaskSendParams) -> str:
@@ -225,23 +321,58 @@ class DatabaseAgentTaskManager(InMemoryTaskManager):
             raise ValueError("Only text parts are supported")
         return part.text
 
-    async def send_task_notification(self, task: Task):
+    async def send_task_notification(
+        self, task: Task, artifacts: list[Artifact] | None = None
+    ):
         if not await self.has_push_notification_info(task.id):
             logger.info(f"No push notification info found for task {task.id}")
             return
         push_info = await self.get_push_notification_info(task.id)
 
         logger.info(f"Notifying for task {task.id} => {task.status.state}")
-        await self.notification_sender_auth.send_push_notification(
-            push_info.url, data=task.model_dump(exclude_none=True)
-        )
+        if push_info.payloadMode == "delta":
+            # Only the change: new artifacts and the current status.
+            payloads = [
+                TaskArtifactUpdateEvent(id=task.id, artifact=artifact).model_dump(
+                    exclude_none=True
+                )
+                for artifact in artifacts or []
+            ]
+            payloads.append(
+                TaskStatusUpdateEvent(
+                    id=task.id,
+                    status=task.status,
+                    final=task.status.state in FINAL_TASK_STATES,
+                ).model_dump(exclude_none=True)
+            )
+        else:
+            payloads = [task.model_dump(exclude_none=True)]
+
+        # Delivered in the background: the task never waits on the webhook.
+        if (
+            push_info.coalesceWindow
+            and task.status.state == TaskState.WORKING
+            and not artifacts
+        ):
+            self.push_notification_queue.enqueue_coalesced(
+                task.id, push_info.url, payloads[-1], push_info.coalesceWindow
+            )
+            return
+
+        # Keyed by task id, the events arrive in order, so the final status
+        # update never arrives before its artifact.
+        self.push_notification_queue.discard_coalesced(task.id)
+        for payload in payloads:
+            self.push_notification_queue.enqueue(push_info.url, payload, task.id)
 
     async def on_resubscribe_to_task(
         self, request
     ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
-        task_id_params: TaskIdParams = request.params
+        task_id_params: TaskResubscriptionParams = request.params
         try:
-            sse_event_queue = await self.setup_sse_consumer(task_id_params.id, True)
+            sse_event_queue = await self.setup_sse_consumer(
+                task_id_params.id, True, task_id_params.lastEventId
+            )
             return self.dequeue_events_for_sse(
                 request.id, task_id_params.id, sse_event_queue
             )
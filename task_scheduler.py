@@ -0,0 +1,179 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import nullcontext
+from enum import Enum
+from typing import Any, Callable, Coroutine
+
+from pydantic import BaseModel
+
+from utils import redact_identifier
+
+
+class SchedulingOrder(str, Enum):
+    FIFO = "fifo"
+    PRIORITY = "priority"
+
+
+class TaskSchedulerPolicy(BaseModel):
+    """Limits for concurrently running agent runs of a task manager.
+
+    ``max_concurrent_runs <= 0`` disables the limit. Runs beyond the limit wait
+    in a queue, either in arrival order (fifo) or by the ``priority`` in the
+    task's metadata, higher first and in arrival order among equal priorities.
+
+    With ``ordered_sessions`` runs of the same session execute strictly one
+    after another in arrival order; only the head of each session queue competes
+    for a slot, so different sessions still run in parallel.
+    """
+
+    max_concurrent_runs: int = 16
+    order: SchedulingOrder = SchedulingOrder.FIFO
+    ordered_sessions: bool = True
+
+
+class RunTimeStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+        }
+
+
+class SessionQueue:
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.runs = 0
+
+    def queued(self) -> int:
+        return self.runs - 1 if self.lock.locked() else self.runs
+
+
+class TaskRunScheduler:
+    """Runs agent coroutines with a bounded number of concurrent runs.
+
+    A run waiting for a slot stays an ordinary asyncio task, so cancelling it
+    (e.g. via tasks/cancel) simply removes it from the queue. A finished run
+    hands its slot directly to the next queued run.
+    """
+
+    def __init__(self, policy: TaskSchedulerPolicy | None = None):
+        self.policy = policy if policy is not None else TaskSchedulerPolicy()
+        self.running = 0
+        self.queue_wait = RunTimeStats()
+        self.run_time = RunTimeStats()
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._queued = 0
+        self._sequence = itertools.count()
+        self._sessions: dict[str, SessionQueue] = {}
+
+    def queued(self) -> int:
+        return self._queued
+
+    async def run(
+        self,
+        coro: Coroutine,
+        priority: int = 0,
+        on_start: Callable[[], None] | None = None,
+        session_id: str | None = None,
+    ) -> Any:
+        submitted = time.monotonic()
+        started = None
+        session = self._join_session(session_id)
+        try:
+            async with session.lock if session is not None else nullcontext():
+                await self._acquire(priority)
+                started = time.monotonic()
+                self.queue_wait.add(started - submitted)
+                try:
+                    if on_start is not None:
+                        on_start()
+                    return await coro
+                finally:
+                    self.run_time.add(time.monotonic() - started)
+                    self._release()
+        finally:
+            if started is None:
+                # Cancelled before the run started.
+                coro.close()
+            if session is not None:
+                self._leave_session(session_id, session)
+
+    def _join_session(self, session_id: str | None) -> SessionQueue | None:
+        if session_id is None or not self.policy.ordered_sessions:
+            return None
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = SessionQueue()
+        session.runs += 1
+        return session
+
+    def _leave_session(self, session_id: str, session: SessionQueue):
+        session.runs -= 1
+        if session.runs == 0 and self._sessions.get(session_id) is session:
+            del self._sessions[session_id]
+
+    async def _acquire(self, priority: int):
+        max_concurrent_runs = self.policy.max_concurrent_runs
+        if max_concurrent_runs <= 0 or (
+            self.running < max_concurrent_runs and not self._queued
+        ):
+            self.running += 1
+            return
+
+        key = -priority if self.policy.order == SchedulingOrder.PRIORITY else 0
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (key, next(self._sequence), future))
+        self._queued += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                self._queued -= 1
+            else:
+                # The slot was already handed over: pass it on to the next
+                # waiter.
+                self._release()
+            raise
+
+    def _release(self):
+        # Cancelled waiters stay in the heap and are skipped here.
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self._queued -= 1
+                future.set_result(None)
+                return
+        self.running -= 1
+
+    def get_metrics(self) -> dict[str, Any]:
+        return {
+            "max_concurrent_runs": self.policy.max_concurrent_runs,
+            "order": self.policy.order.value,
+            "running": self.running,
+            "queued": self.queued(),
+            "sessions": len(self._sessions),
+            "max_session_queue_length": max(
+                (session.queued() for session in self._sessions.values()), default=0
+            ),
+            # Only sessions with waiting runs, to keep the output small.
+            "session_queue_lengths": {
+                redact_identifier(session_id): session.queued()
+                for session_id, session in self._sessions.items()
+                if session.queued()
+            },
+            "queue_wait_seconds": self.queue_wait.as_dict(),
+            "run_seconds": self.run_time.as_dict(),
+        }
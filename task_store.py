@@ -0,0 +1,399 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable
+
+from pydantic import BaseModel
+
+from custom_types import Message, PushNotificationConfig, Task
+
+logger = logging.getLogger(__name__)
+
+
+class TaskRetentionPolicy(BaseModel):
+    """Limits for tasks kept by a task manager.
+
+    Only tasks in a terminal state (completed, failed, canceled) are evicted, least
+    recently used first. ``None`` disables the respective limit.
+    """
+
+    max_tasks: int | None = None
+    max_bytes: int | None = None
+    terminal_task_ttl: float | None = None
+    eviction_interval: float = 30.0
+
+
+class TaskStore(ABC):
+    # True if several worker processes can use the same store.
+    is_shared: bool = False
+
+    @abstractmethod
+    async def get_task(
+        self, task_id: str, history_length: int | None = None
+    ) -> Task | None:
+        """Returns the task with at least its last ``history_length`` messages.
+
+        ``None`` loads the full history. Stores may return more messages than
+        requested, so callers that need an exact window slice the result.
+        """
+        pass
+
+    @abstractmethod
+    async def save_task(self, task: Task) -> None:
+        pass
+
+    @abstractmethod
+    async def update_task(
+        self, task_id: str, update: Callable[[Task | None], Task | None]
+    ) -> Task | None:
+        """Reads, modifies and saves a task as one atomic step.
+
+        ``update`` gets the stored task with its full history (``None`` if there is
+        none) and returns the task to save, or ``None`` to leave the store
+        unchanged. Exceptions raised by ``update`` reach the caller and nothing is
+        saved. Returns the task as stored afterwards.
+
+        Unlike a get_task/save_task pair this is safe across worker processes
+        sharing the store: no other write can land between the read and the write.
+        """
+        pass
+
+    @abstractmethod
+    async def delete_task(self, task_id: str) -> None:
+        pass
+
+    @abstractmethod
+    async def get_push_notification_info(
+        self, task_id: str
+    ) -> PushNotificationConfig | None:
+        pass
+
+    @abstractmethod
+    async def set_push_notification_info(
+        self, task_id: str, notification_config: PushNotificationConfig
+    ) -> None:
+        pass
+
+    async def close(self):
+        pass
+
+
+class InMemoryTaskStore(TaskStore):
+    def __init__(self):
+        self.tasks: dict[str, Task] = {}
+        self.push_notification_infos: dict[str, PushNotificationConfig] = {}
+
+    async def get_task(
+        self, task_id: str, history_length: int | None = None
+    ) -> Task | None:
+        return self.tasks.get(task_id)
+
+    async def save_task(self, task: Task) -> None:
+        self.tasks[task.id] = task
+
+    async def update_task(
+        self, task_id: str, update: Callable[[Task | None], Task | None]
+    ) -> Task | None:
+        # No await between read and write: already atomic on the event loop.
+        task = update(self.tasks.get(task_id))
+        if task is None:
+            return self.tasks.get(task_id)
+        self.tasks[task_id] = task
+        return task
+
+    async def delete_task(self, task_id: str) -> None:
+        self.tasks.pop(task_id, None)
+        self.push_notification_infos.pop(task_id, None)
+
+    async def get_push_notification_info(
+        self, task_id: str
+    ) -> PushNotificationConfig | None:
+        return self.push_notification_infos.get(task_id)
+
+    async def set_push_notification_info(
+        self, task_id: str, notification_config: PushNotificationConfig
+    ) -> None:
+        self.push_notification_infos[task_id] = notification_config
+
+
+class SqliteTaskStore(TaskStore):
+    """Task store backed by a SQLite database in WAL mode.
+
+    The database file can be shared by several worker processes on the same host,
+    so every worker sees the same tasks and push notification configs. Each process
+    opens its own connection lazily (connections must not cross a fork) and runs
+    the blocking SQLite calls in a worker thread.
+
+    Writes use group commit: they are queued and a single writer commits all
+    writes that arrived in the meantime in one transaction. Writes to the same
+    row within a batch are coalesced. Callers still wait until their write is
+    committed, but the event loop never blocks on disk I/O and concurrent status
+    transitions share one commit.
+
+    The task history is stored segmented, one row per message keyed by
+    (task_id, seq). Saving a task only inserts messages that are not stored yet,
+    and reading the last k messages is an index range scan of k rows.
+
+    ``update_task`` reads the task and computes which messages are new inside the
+    same ``BEGIN IMMEDIATE`` transaction that writes them, so concurrent updates
+    from several workers never overwrite each other's messages.
+    """
+
+    is_shared = True
+
+    def __init__(self, path: str, commit_interval: float = 0.0):
+        self.path = path
+        # Extra wait before each commit, to collect larger batches.
+        self.commit_interval = commit_interval
+        self._connection: sqlite3.Connection | None = None
+        self._connection_pid: int | None = None
+        self._connection_lock = threading.Lock()
+        self._pending_writes: dict[
+            tuple[str, str], Callable[[sqlite3.Connection], None]
+        ] = {}
+        self._pending_futures: list[asyncio.Future] = []
+        self._writer_task: asyncio.Task | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None or self._connection_pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            # WITHOUT ROWID: the tables are clustered directly by task id.
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS tasks (id TEXT PRIMARY KEY, "
+                "data TEXT NOT NULL, history_length INTEGER NOT NULL) WITHOUT ROWID"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS task_history (task_id TEXT NOT NULL, "
+                "seq INTEGER NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (task_id, seq)) WITHOUT ROWID"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS push_notification_infos "
+                "(task_id TEXT PRIMARY KEY, data TEXT NOT NULL) WITHOUT ROWID"
+            )
+            self._connection = connection
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    def _execute(self, sql: str, params: tuple) -> list[tuple]:
+        with self._connection_lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    def _execute_batch(self, writes: list[Callable[[sqlite3.Connection], None]]):
+        with self._connection_lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                for write in writes:
+                    write(connection)
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    async def _run(self, sql: str, params: tuple) -> list[tuple]:
+        return await asyncio.to_thread(self._execute, sql, params)
+
+    async def _write(
+        self, key: tuple[str, str], write: Callable[[sqlite3.Connection], None]
+    ):
+        future = asyncio.get_running_loop().create_future()
+        # A replaced write moves to the end, so the batch keeps the order of the
+        # calls.
+        self._pending_writes.pop(key, None)
+        self._pending_writes[key] = write
+        self._pending_futures.append(future)
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.create_task(self._write_batches())
+        await future
+
+    async def _write_batches(self):
+        while self._pending_writes:
+            if self.commit_interval > 0:
+                await asyncio.sleep(self.commit_interval)
+            writes, self._pending_writes = self._pending_writes, {}
+            futures, self._pending_futures = self._pending_futures, []
+            try:
+                await asyncio.to_thread(self._execute_batch, list(writes.values()))
+            except Exception as e:
+                logger.error(f"Error while committing {len(writes)} task writes: {e}")
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for future in futures:
+                    if not future.done():
+                        future.set_result(None)
+
+    async def close(self):
+        if self._writer_task is not None:
+            await self._writer_task
+            self._writer_task = None
+        with self._connection_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    @staticmethod
+    def _select_task(
+        connection: sqlite3.Connection, task_id: str, history_length: int | None
+    ) -> str | None:
+        row = connection.execute(
+            "SELECT data FROM tasks WHERE id = ?", (task_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        if history_length is None:
+            history = connection.execute(
+                "SELECT data FROM task_history WHERE task_id = ? ORDER BY seq",
+                (task_id,),
+            ).fetchall()
+        else:
+            history = connection.execute(
+                "SELECT data FROM task_history WHERE task_id = ? "
+                "ORDER BY seq DESC LIMIT ?",
+                (task_id, history_length),
+            ).fetchall()
+            history.reverse()
+
+        # The task JSON (without history) and the stored messages are joined
+        # into one JSON document directly and validated once.
+        messages = ",".join(message for (message,) in history)
+        return f'{row[0][:-1]},"history":[{messages}]}}'
+
+    def _read_task(self, task_id: str, history_length: int | None) -> str | None:
+        with self._connection_lock:
+            connection = self._connect()
+            # A read transaction, so the task and its history belong to the same
+            # state.
+            connection.execute("BEGIN")
+            try:
+                return self._select_task(connection, task_id, history_length)
+            finally:
+                connection.execute("COMMIT")
+
+    async def get_task(
+        self, task_id: str, history_length: int | None = None
+    ) -> Task | None:
+        data = await asyncio.to_thread(self._read_task, task_id, history_length)
+        if data is None:
+            return None
+        return Task.model_validate_json(data)
+
+    @staticmethod
+    def _write_task(
+        connection: sqlite3.Connection,
+        task_id: str,
+        data: str,
+        history: list[Message],
+        stored_length: int,
+    ):
+        # The history is append-only; messages already stored are not written
+        # again.
+        connection.executemany(
+            "INSERT OR REPLACE INTO task_history (task_id, seq, data) "
+            "VALUES (?, ?, ?)",
+            (
+                (task_id, seq, message.model_dump_json())
+                for seq, message in enumerate(
+                    history[stored_length:], start=stored_length
+                )
+            ),
+        )
+        connection.execute(
+            "INSERT OR REPLACE INTO tasks (id, data, history_length) "
+            "VALUES (?, ?, ?)",
+            (task_id, data, max(stored_length, len(history))),
+        )
+
+    async def save_task(self, task: Task) -> None:
+        # Task data is serialized right away, so later changes to the object do
+        # not leak into the write already queued.
+        task_id = task.id
+        data = task.model_dump_json(exclude={"history"})
+        history = list(task.history or [])
+
+        def write(connection: sqlite3.Connection):
+            row = connection.execute(
+                "SELECT history_length FROM tasks WHERE id = ?", (task_id,)
+            ).fetchone()
+            stored_length = row[0] if row is not None else 0
+            self._write_task(connection, task_id, data, history, stored_length)
+
+        await self._write(("tasks", task_id), write)
+
+    async def update_task(
+        self, task_id: str, update: Callable[[Task | None], Task | None]
+    ) -> Task | None:
+        outcome: list[Task | None | Exception] = []
+
+        def write(connection: sqlite3.Connection):
+            # Runs in the batch's write transaction: no other worker can change
+            # the same task between the read and the write.
+            try:
+                stored = self._select_task(connection, task_id, None)
+                task = None if stored is None else Task.model_validate_json(stored)
+                stored_length = len(task.history) if task is not None else 0
+                updated = update(task)
+            except Exception as e:
+                # Discard only this update, not the whole batch.
+                outcome.append(e)
+                return
+            if updated is not None:
+                self._write_task(
+                    connection,
+                    task_id,
+                    updated.model_dump_json(exclude={"history"}),
+                    list(updated.history or []),
+                    stored_length,
+                )
+            outcome.append(updated if updated is not None else task)
+
+        # Updates are never coalesced: each one builds on the previous one.
+        await self._write(("update", id(write)), write)
+        if isinstance(outcome[0], Exception):
+            raise outcome[0]
+        return outcome[0]
+
+    async def delete_task(self, task_id: str) -> None:
+        def write(connection: sqlite3.Connection):
+            connection.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            connection.execute(
+                "DELETE FROM task_history WHERE task_id = ?", (task_id,)
+            )
+            connection.execute(
+                "DELETE FROM push_notification_infos WHERE task_id = ?", (task_id,)
+            )
+
+        await self._write(("tasks", task_id), write)
+
+    async def get_push_notification_info(
+        self, task_id: str
+    ) -> PushNotificationConfig | None:
+        rows = await self._run(
+            "SELECT data FROM push_notification_infos WHERE task_id = ?", (task_id,)
+        )
+        if not rows:
+            return None
+        return PushNotificationConfig.model_validate_json(rows[0][0])
+
+    async def set_push_notification_info(
+        self, task_id: str, notification_config: PushNotificationConfig
+    ) -> None:
+        data = notification_config.model_dump_json()
+
+        def write(connection: sqlite3.Connection):
+            connection.execute(
+                "INSERT OR REPLACE INTO push_notification_infos (task_id, data) "
+                "VALUES (?, ?)",
+                (task_id, data),
+            )
+
+        await self._write(("push_notification_infos", task_id), write)
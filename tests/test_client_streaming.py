@@ -0,0 +1,102 @@
+"""Concurrent A2AClient.send_task_streaming calls progress in parallel.
+
+A stub agent (sse-starlette on uvicorn, in a thread) answers every
+tasks/sendSubscribe with a few SSE events spaced ``EVENT_INTERVAL`` apart. If
+the client blocked the event loop while streaming, N streams would take N times
+as long as one.
+"""
+
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+from sse_starlette.sse import EventSourceResponse
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.routing import Route
+
+from client import A2AClient
+from custom_types import (
+    Message,
+    SendTaskStreamingResponse,
+    TaskSendParams,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+EVENTS = 5
+EVENT_INTERVAL = 0.1
+STREAMS = 10
+
+
+async def send_task_subscribe(request: Request):
+    body = await request.json()
+    task_id = body["params"]["id"]
+
+    async def events():
+        for event in range(EVENTS):
+            await asyncio.sleep(EVENT_INTERVAL)
+            final = event == EVENTS - 1
+            state = TaskState.COMPLETED if final else TaskState.WORKING
+            yield SendTaskStreamingResponse(
+                id=body["id"],
+                result=TaskStatusUpdateEvent(
+                    id=task_id, status=TaskStatus(state=state), final=final
+                ),
+            ).model_dump_json(exclude_none=True)
+
+    return EventSourceResponse(events())
+
+
+@pytest.fixture(scope="module")
+def agent_url():
+    app = Starlette(routes=[Route("/", send_task_subscribe, methods=["POST"])])
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]})
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{sock.getsockname()[1]}/"
+    server.should_exit = True
+    thread.join()
+    sock.close()
+
+
+async def stream_task(client: A2AClient, task_id: str) -> list[TaskState]:
+    params = TaskSendParams(
+        id=task_id,
+        sessionId=task_id,
+        message=Message(role="user", parts=[TextPart(text="100 USD in EUR?")]),
+    )
+    return [
+        response.result.status.state
+        async for response in client.send_task_streaming(params.model_dump())
+    ]
+
+
+def test_concurrent_streams_progress_in_parallel(agent_url):
+    async def run() -> tuple[float, float, list[list[TaskState]]]:
+        async with A2AClient(url=agent_url) as client:
+            start = time.perf_counter()
+            await stream_task(client, "task-0")
+            single = time.perf_counter() - start
+
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *(stream_task(client, f"task-{i}") for i in range(STREAMS))
+            )
+            return single, time.perf_counter() - start, results
+
+    single, concurrent, results = asyncio.run(run())
+
+    expected = [TaskState.WORKING] * (EVENTS - 1) + [TaskState.COMPLETED]
+    assert results == [expected] * STREAMS
+    # In parallel: about as long as one stream, not STREAMS times as long.
+    assert concurrent < single * 2
@@ -1,4 +1,6 @@
+import hashlib
 from typing import List
+from urllib.parse import urlsplit
 
 from custom_types import (
     ContentTypeNotSupportedError,
@@ -27,3 +29,26 @@ def new_incompatible_types_error(request_id):
 
 def new_not_implemented_error(request_id):
     return JSONRPCResponse(id=request_id, error=UnsupportedOperationError())
+
+
+def redact_url(url: str) -> str:
+    """Reduces a URL to scheme, host and port for public output such as /metrics.
+
+    Webhook URLs often carry secrets in userinfo, path or query string.
+    """
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    if parts.port is not None:
+        host = f"{host}:{parts.port}"
+    return f"{parts.scheme}://{host}"
+
+
+def redact_identifier(value: str | None) -> str | None:
+    """Replaces an id (task, session) with a short hash for public output.
+
+    The same id always maps to the same hash, so entries can still be matched
+    against the server's own logs.
+    """
+    if value is None:
+        return None
+    return hashlib.sha256(str(value).encode()).hexdigest()[:12]